@@ -1,11 +1,17 @@
+import numpy as np
 import pandas as pd
 import yaml
-import json
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+import orjson
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import threading
 import time
+from concurrent.futures import as_completed
 from pathlib import Path
 
 from .rule import AlertRule
@@ -19,15 +25,63 @@ except ImportError:
         print(f"TELEGRAM: {message}")
         return True
 
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import PatternMatchingEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+SENTIMENT_BARS_PARQUET = 'data/sentiment_bars.parquet'
+SENTIMENT_BARS_CSV = 'data/sentiment_bars.csv'
+# Delay before reacting to a write, so bursts of events coalesce into one tick
+MONITOR_DEBOUNCE_SECONDS = 0.2
+
+# Comparisons that can be broadcast over many rules' thresholds at once
+VECTOR_OPS = {
+    '>': np.greater,
+    '<': np.less,
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+    'cross_above': np.greater,
+    'cross_below': np.less,
+}
+# Two-sided comparisons, broadcast over [low, high] threshold columns
+RANGE_OPS = {
+    'between': lambda x, low, high: (low <= x) & (x <= high),
+    'outside': lambda x, low, high: (x < low) | (x > high),
+}
+
+def _is_number(value: Any) -> bool:
+    """Plain int/float threshold (bools excluded)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+# Snapshot + append-only change log for rules and webhooks
+RULES_SNAPSHOT = Path('data/alert_rules.json')
+RULES_LOG = Path('data/alert_rules.jsonl')
+WEBHOOKS_SNAPSHOT = Path('data/webhooks.json')
+WEBHOOKS_LOG = Path('data/webhooks.jsonl')
+# Logs smaller than this never trigger compaction
+COMPACTION_MIN_BYTES = 4096
+
 class AlertEngine:
     def __init__(self, config_path: str = 'config.yml'):
         self.config_path = config_path
         self.rules: Dict[str, AlertRule] = {}
+        self.rules_by_ticker: Dict[str, List[AlertRule]] = {}
         self.webhooks: Dict[str, WebhookConfig] = {}
         self.webhook_manager = WebhookManager()
         self.logger = AlertLogger()
         self.is_running = False
         self.monitor_thread: Optional[threading.Thread] = None
+        self.observer = None
+        self._debounce_timer: Optional[threading.Timer] = None
+        self._tick_lock = threading.Lock()
+
+        # (path, mtime) of the sentiment bars file read on the last tick
+        self._last_source: Optional[Tuple[str, float]] = None
 
         # Load configuration
         self._load_config()
@@ -39,62 +93,131 @@ class AlertEngine:
     def _load_config(self) -> None:
         """Load main configuration"""
         with open(self.config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+            self.config = yaml.load(f, Loader=_Loader)
+
+    def _append_log(self, log_file: Path, entry: Dict[str, Any]) -> None:
+        """Append a single change record to an append-only log"""
+        log_file.parent.mkdir(exist_ok=True)
+        with open(log_file, 'ab') as f:
+            f.write(orjson.dumps(entry) + b'\n')
+
+    def _replay_log(self, log_file: Path) -> List[Dict[str, Any]]:
+        """Read the change records of a log, skipping torn or corrupt lines"""
+        entries = []
+        if not log_file.exists():
+            return entries
+
+        with open(log_file, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    self.logger.logger.warning(f"Skipping corrupt entry in {log_file}")
+        return entries
+
+    def _write_snapshot(self, snapshot_file: Path, log_file: Path, data: List[Dict]) -> None:
+        """Atomically replace the snapshot with the current state and reset the log"""
+        snapshot_file.parent.mkdir(exist_ok=True)
+        tmp_file = snapshot_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_file, snapshot_file)
+        log_file.unlink(missing_ok=True)
+
+    def _needs_compaction(self, snapshot_file: Path, log_file: Path) -> bool:
+        """Compact once the log grows past twice the snapshot size"""
+        if not log_file.exists():
+            return False
+        snapshot_size = snapshot_file.stat().st_size if snapshot_file.exists() else 0
+        return log_file.stat().st_size > 2 * max(snapshot_size, COMPACTION_MIN_BYTES)
 
     def _load_rules(self) -> None:
-        """Load alert rules from storage"""
-        rules_file = Path('data/alert_rules.json')
-        if rules_file.exists():
-            try:
-                with open(rules_file, 'r') as f:
-                    rules_data = json.load(f)
+        """Load alert rules from the snapshot and replay the change log"""
+        try:
+            if RULES_SNAPSHOT.exists():
+                with open(RULES_SNAPSHOT, 'rb') as f:
+                    rules_data = orjson.loads(f.read())
                     for rule_data in rules_data:
                         rule = AlertRule.from_dict(rule_data)
-                        self.rules[rule.rule_id] = rule
-            except Exception as e:
-                self.logger.logger.error(f"Error loading alert rules: {e}")
+                        self._set_rule(rule)
 
-    def _save_rules(self) -> None:
-        """Save alert rules to storage"""
-        rules_file = Path('data/alert_rules.json')
-        rules_file.parent.mkdir(exist_ok=True)
+            for entry in self._replay_log(RULES_LOG):
+                if entry['op'] == 'add':
+                    self._set_rule(AlertRule.from_dict(entry['rule']))
+                elif entry['op'] == 'del':
+                    self._unset_rule(entry['id'])
+        except Exception as e:
+            self.logger.logger.error(f"Error loading alert rules: {e}")
 
+    def _compact_rules(self) -> None:
+        """Fold the rules change log into a fresh snapshot"""
         rules_data = [rule.to_dict() for rule in self.rules.values()]
-        with open(rules_file, 'w') as f:
-            json.dump(rules_data, f, indent=2)
+        self._write_snapshot(RULES_SNAPSHOT, RULES_LOG, rules_data)
+
+    def _log_rule_change(self, entry: Dict[str, Any]) -> None:
+        """Persist a rule mutation, compacting when the log gets large"""
+        self._append_log(RULES_LOG, entry)
+        if self._needs_compaction(RULES_SNAPSHOT, RULES_LOG):
+            self._compact_rules()
 
     def _load_webhooks(self) -> None:
-        """Load webhook configurations"""
-        webhooks_file = Path('data/webhooks.json')
-        if webhooks_file.exists():
-            try:
-                with open(webhooks_file, 'r') as f:
-                    webhooks_data = json.load(f)
+        """Load webhook configurations from the snapshot and replay the change log"""
+        try:
+            if WEBHOOKS_SNAPSHOT.exists():
+                with open(WEBHOOKS_SNAPSHOT, 'rb') as f:
+                    webhooks_data = orjson.loads(f.read())
                     for webhook_data in webhooks_data:
                         webhook = WebhookConfig.from_dict(webhook_data)
                         self.webhooks[webhook.url] = webhook
-            except Exception as e:
-                self.logger.logger.error(f"Error loading webhooks: {e}")
 
-    def _save_webhooks(self) -> None:
-        """Save webhook configurations"""
-        webhooks_file = Path('data/webhooks.json')
-        webhooks_file.parent.mkdir(exist_ok=True)
+            for entry in self._replay_log(WEBHOOKS_LOG):
+                if entry['op'] == 'add':
+                    webhook = WebhookConfig.from_dict(entry['webhook'])
+                    self.webhooks[webhook.url] = webhook
+                elif entry['op'] == 'del':
+                    self.webhooks.pop(entry['url'], None)
+        except Exception as e:
+            self.logger.logger.error(f"Error loading webhooks: {e}")
 
+    def _compact_webhooks(self) -> None:
+        """Fold the webhooks change log into a fresh snapshot"""
         webhooks_data = [webhook.to_dict() for webhook in self.webhooks.values()]
-        with open(webhooks_file, 'w') as f:
-            json.dump(webhooks_data, f, indent=2)
+        self._write_snapshot(WEBHOOKS_SNAPSHOT, WEBHOOKS_LOG, webhooks_data)
+
+    def _log_webhook_change(self, entry: Dict[str, Any]) -> None:
+        """Persist a webhook mutation, compacting when the log gets large"""
+        self._append_log(WEBHOOKS_LOG, entry)
+        if self._needs_compaction(WEBHOOKS_SNAPSHOT, WEBHOOKS_LOG):
+            self._compact_webhooks()
+
+    def _set_rule(self, rule: AlertRule) -> None:
+        """Store a rule and keep the per-ticker index in sync"""
+        self._unset_rule(rule.rule_id)
+        self.rules[rule.rule_id] = rule
+        self.rules_by_ticker.setdefault(rule.ticker, []).append(rule)
+
+    def _unset_rule(self, rule_id: str) -> Optional[AlertRule]:
+        """Drop a rule from storage and from the per-ticker index"""
+        rule = self.rules.pop(rule_id, None)
+        if rule is not None:
+            ticker_rules = self.rules_by_ticker[rule.ticker]
+            ticker_rules.remove(rule)
+            if not ticker_rules:
+                del self.rules_by_ticker[rule.ticker]
+        return rule
 
     def add_rule(self, rule: AlertRule) -> None:
         """Add a new alert rule"""
-        self.rules[rule.rule_id] = rule
-        self._save_rules()
+        self._set_rule(rule)
+        self._log_rule_change({'op': 'add', 'rule': rule.to_dict()})
 
     def remove_rule(self, rule_id: str) -> bool:
         """Remove an alert rule"""
-        if rule_id in self.rules:
-            del self.rules[rule_id]
-            self._save_rules()
+        if self._unset_rule(rule_id) is not None:
+            self._log_rule_change({'op': 'del', 'id': rule_id})
             return True
         return False
 
@@ -109,13 +232,13 @@ class AlertEngine:
     def add_webhook(self, webhook: WebhookConfig) -> None:
         """Add a webhook configuration"""
         self.webhooks[webhook.url] = webhook
-        self._save_webhooks()
+        self._log_webhook_change({'op': 'add', 'webhook': webhook.to_dict()})
 
     def remove_webhook(self, url: str) -> bool:
         """Remove a webhook configuration"""
         if url in self.webhooks:
             del self.webhooks[url]
-            self._save_webhooks()
+            self._log_webhook_change({'op': 'del', 'url': url})
             return True
         return False
 
@@ -123,23 +246,49 @@ class AlertEngine:
         """List all webhooks"""
         return [webhook.to_dict() for webhook in self.webhooks.values()]
 
+    def precompute_latest(self, sentiment_data: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """Latest bar per ticker, computed once and shared by all rules"""
+        return (
+            sentiment_data.sort_values('bucket_start')
+            .groupby('ticker', sort=False).tail(1)
+            .set_index('ticker')
+            .to_dict('index')
+        )
+
     def process_alerts(self, sentiment_data: pd.DataFrame, volatility_data: Optional[Dict] = None) -> List[Dict]:
         """Process all alert rules and return triggered alerts"""
         triggered_alerts = []
 
-        for rule in self.rules.values():
-            try:
-                if rule.evaluate(sentiment_data, volatility_data):
+        if sentiment_data.empty:
+            return triggered_alerts
+
+        latest_by_ticker = self.precompute_latest(sentiment_data)
+
+        now = datetime.now()
+        tick = time.monotonic()
+
+        for ticker, ticker_rules in self.rules_by_ticker.items():
+            latest_data = latest_by_ticker.get(ticker)
+            if latest_data is None:
+                continue
+
+            # Disabled and cooling-down rules can't fire; skip before evaluating
+            candidates = [rule for rule in ticker_rules if rule.enabled and not rule.in_cooldown(tick)]
+            if not candidates:
+                continue
+
+            for rule in self._evaluate_rules(candidates, latest_data, volatility_data):
+                try:
                     actions = rule.trigger()
                     triggered_alerts.append({
                         'rule': rule,
                         'actions': actions,
-                        'timestamp': datetime.now()
+                        'timestamp': now
                     })
 
                     # Log the trigger
                     trigger_data = {
-                        'sentiment_data': sentiment_data[sentiment_data['ticker'] == rule.ticker].to_dict('records')[-1] if not sentiment_data.empty else {},
+                        'sentiment_data': {'ticker': ticker, **latest_data},
                         'volatility': volatility_data.get(rule.ticker) if volatility_data else None
                     }
                     self.logger.log_alert_triggered(
@@ -147,13 +296,64 @@ class AlertEngine:
                         rule.conditions, actions, trigger_data
                     )
 
-            except Exception as e:
-                self.logger.log_rule_error(rule.rule_id, str(e))
+                except Exception as e:
+                    self.logger.log_rule_error(rule.rule_id, str(e))
 
         return triggered_alerts
 
+    def _evaluate_rules(self, rules: List[AlertRule], latest_data: Dict[str, Any],
+                        volatility_data: Optional[Dict]) -> List[AlertRule]:
+        """Return the rules of one ticker whose conditions hold on its latest bar"""
+        fired = []
+        groups: Dict[Tuple[str, str], List[AlertRule]] = {}
+
+        # Single-condition numeric rules on the same field/operator are compared in one numpy call
+        for rule in rules:
+            if len(rule.conditions) == 1:
+                condition = rule.conditions[0]
+                field, op, value = condition.get('field'), condition.get('operator'), condition.get('value')
+                if field != 'volatility' and (
+                        (op in VECTOR_OPS and _is_number(value))
+                        or (op in RANGE_OPS and isinstance(value, (list, tuple)) and len(value) == 2
+                            and _is_number(value[0]) and _is_number(value[1]))):
+                    groups.setdefault((field, op), []).append(rule)
+                    continue
+            self._evaluate_rule(rule, latest_data, volatility_data, fired)
+
+        for (field, op), group in groups.items():
+            field_value = latest_data.get(field)
+            if field_value is None or pd.isna(field_value):
+                continue
+            try:
+                if op in RANGE_OPS:
+                    bounds = np.array([rule.conditions[0]['value'] for rule in group], dtype=float)
+                    mask = RANGE_OPS[op](field_value, bounds[:, 0], bounds[:, 1])
+                else:
+                    thresholds = np.fromiter((rule.conditions[0]['value'] for rule in group), dtype=float, count=len(group))
+                    mask = VECTOR_OPS[op](field_value, thresholds)
+            except (TypeError, ValueError):
+                # Non-numeric field: fall back to per-rule evaluation
+                for rule in group:
+                    self._evaluate_rule(rule, latest_data, volatility_data, fired)
+                continue
+            fired.extend(group[i] for i in np.flatnonzero(mask))
+
+        return fired
+
+    def _evaluate_rule(self, rule: AlertRule, latest_data: Dict[str, Any],
+                       volatility_data: Optional[Dict], fired: List[AlertRule]) -> None:
+        """Per-rule evaluation for multi-condition and non-vectorizable rules"""
+        try:
+            if rule.conditions_met(latest_data, volatility_data):
+                fired.append(rule)
+        except Exception as e:
+            self.logger.log_rule_error(rule.rule_id, str(e))
+
     def execute_actions(self, triggered_alerts: List[Dict]) -> None:
         """Execute actions for triggered alerts"""
+        # Webhook deliveries run concurrently on the manager's pool
+        webhook_futures = []
+
         for alert in triggered_alerts:
             rule = alert['rule']
             actions = alert['actions']
@@ -162,12 +362,20 @@ class AlertEngine:
                 action_type = action.get('type')
 
                 if action_type == 'webhook':
-                    self._execute_webhook_action(rule, action)
+                    webhook_futures.append(
+                        self.webhook_manager.executor.submit(self._execute_webhook_action, rule, action)
+                    )
                 elif action_type == 'telegram':
                     self._execute_telegram_action(rule, action)
                 elif action_type == 'log':
                     self._execute_log_action(rule, action)
 
+        for future in as_completed(webhook_futures):
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.logger.error(f"Error executing webhook action: {e}")
+
     def _execute_webhook_action(self, rule: AlertRule, action: Dict) -> None:
         """Execute webhook action"""
         webhook_url = action.get('url')
@@ -222,30 +430,88 @@ class AlertEngine:
         pass
 
     def start_monitoring(self, check_interval: int = 60) -> None:
-        """Start background monitoring"""
+        """Start background monitoring (file-system events, polling without watchdog)"""
         if self.is_running:
             return
 
         self.is_running = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, args=(check_interval,))
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
+
+        if WATCHDOG_AVAILABLE:
+            data_dir = os.path.dirname(SENTIMENT_BARS_PARQUET)
+            os.makedirs(data_dir, exist_ok=True)
+
+            handler = PatternMatchingEventHandler(patterns=['*sentiment_bars*'], ignore_directories=True)
+            handler.on_created = handler.on_modified = handler.on_moved = lambda event: self._schedule_tick()
+
+            self.observer = Observer()
+            self.observer.schedule(handler, data_dir, recursive=False)
+            self.observer.daemon = True
+            self.observer.start()
+
+            # Pick up bars written before monitoring started
+            self._schedule_tick()
+        else:
+            self.monitor_thread = threading.Thread(target=self._monitor_loop, args=(check_interval,))
+            self.monitor_thread.daemon = True
+            self.monitor_thread.start()
 
     def stop_monitoring(self) -> None:
         """Stop background monitoring"""
         self.is_running = False
+        if self._debounce_timer:
+            self._debounce_timer.cancel()
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
         if self.monitor_thread:
             self.monitor_thread.join()
+        # Write out queued log records; the logger stays open for later log_* calls
+        self.logger.flush()
+
+    def _bars_source(self) -> Optional[str]:
+        """Current sentiment bars file: the Parquet copy unless a CSV-only producer wrote after it"""
+        csv_exists = os.path.exists(SENTIMENT_BARS_CSV)
+        if not os.path.exists(SENTIMENT_BARS_PARQUET):
+            return SENTIMENT_BARS_CSV if csv_exists else None
+        if csv_exists and os.path.getmtime(SENTIMENT_BARS_CSV) > os.path.getmtime(SENTIMENT_BARS_PARQUET):
+            return SENTIMENT_BARS_CSV
+        return SENTIMENT_BARS_PARQUET
+
+    def _read_new_bars(self) -> Optional[pd.DataFrame]:
+        """Read the sentiment bars if they changed since the last tick (None if unchanged)"""
+        path = self._bars_source()
+        if path is None:
+            return None
+
+        source = (path, os.path.getmtime(path))
+        if source == self._last_source:
+            return None
+        self._last_source = source
+
+        if path == SENTIMENT_BARS_CSV:
+            sentiment_data = pd.read_csv(path)
+            sentiment_data['bucket_start'] = pd.to_datetime(sentiment_data['bucket_start'])
+            return sentiment_data
+        return pd.read_parquet(path)
+
+    def _schedule_tick(self) -> None:
+        """Debounce file-system events into a single tick"""
+        if self._debounce_timer:
+            self._debounce_timer.cancel()
+        self._debounce_timer = threading.Timer(MONITOR_DEBOUNCE_SECONDS, self._tick)
+        self._debounce_timer.daemon = True
+        self._debounce_timer.start()
+
+    def _tick(self) -> None:
+        """Process sentiment bars written since the last tick"""
+        if not self.is_running:
+            return
 
-    def _monitor_loop(self, check_interval: int) -> None:
-        """Background monitoring loop"""
-        while self.is_running:
+        with self._tick_lock:
             try:
-                # Load latest sentiment data
-                if os.path.exists('data/sentiment_bars.csv'):
-                    sentiment_data = pd.read_csv('data/sentiment_bars.csv')
-                    sentiment_data['bucket_start'] = pd.to_datetime(sentiment_data['bucket_start'])
-
+                sentiment_data = self._read_new_bars()
+                if sentiment_data is not None and not sentiment_data.empty:
                     # Process alerts
                     triggered_alerts = self.process_alerts(sentiment_data)
                     if triggered_alerts:
@@ -254,6 +520,10 @@ class AlertEngine:
             except Exception as e:
                 self.logger.logger.error(f"Error in monitoring loop: {e}")
 
+    def _monitor_loop(self, check_interval: int) -> None:
+        """Polling fallback when watchdog is not installed"""
+        while self.is_running:
+            self._tick()
             time.sleep(check_interval)
 
     def get_stats(self) -> Dict[str, Any]:
@@ -1,11 +1,37 @@
-import json
 import logging
+import mmap
 import os
-from typing import Dict, Any, List
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Iterator, List, Optional
 from datetime import datetime, timedelta
+import orjson
 import pandas as pd
 from pathlib import Path
 
+# Alert lines look like '<asctime> - INFO - ALERT_TRIGGERED: {...}'; asctime has a fixed width
+ALERT_MARKER = 'ALERT_TRIGGERED: '
+ALERT_MARKER_BYTES = ALERT_MARKER.encode()
+ALERT_OFFSET = len('2024-01-01 00:00:00,000 - INFO - ')
+
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize values orjson doesn't handle natively (e.g. pandas Timestamps)"""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    """Fast JSON encoding for log entries"""
+    return orjson.dumps(
+        entry,
+        default=_json_default,
+        option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+    ).decode()
+
+
 class AlertLogger:
     def __init__(self, log_dir: str = 'logs/alerts'):
         self.log_dir = Path(log_dir)
@@ -16,12 +42,41 @@ class AlertLogger:
         self.logger = logging.getLogger('alerts')
         self.logger.setLevel(logging.INFO)
 
+        # Callers only enqueue records; the listener thread does the file I/O
+        self._q: queue.Queue = queue.Queue(-1)
+        self._queue_handler = QueueHandler(self._q)
+        self._listener: Optional[QueueListener] = None
+        self.start()
+
+    def start(self) -> None:
+        """Start the background writer (no-op if it is already running)"""
+        if self._listener is not None:
+            return
+
         # File handler for detailed logs
         fh = logging.FileHandler(self.current_log_file)
         fh.setLevel(logging.INFO)
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         fh.setFormatter(formatter)
-        self.logger.addHandler(fh)
+
+        self._listener = QueueListener(self._q, fh, respect_handler_level=True)
+        self._listener.start()
+        self.logger.addHandler(self._queue_handler)
+
+    def flush(self) -> None:
+        """Block until every queued record has been written to the log file"""
+        if self._listener is not None:
+            self._q.join()
+
+    def close(self) -> None:
+        """Flush pending records and stop the background writer (safe to call twice)"""
+        if self._listener is None:
+            return
+        self.logger.removeHandler(self._queue_handler)
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
 
     def _get_current_log_file(self) -> Path:
         """Get current log file path (daily rotation)"""
@@ -43,7 +98,7 @@ class AlertLogger:
             'trigger_data': trigger_data
         }
 
-        self.logger.info(f"ALERT_TRIGGERED: {json.dumps(log_entry)}")
+        self.logger.info(f"ALERT_TRIGGERED: {_dumps(log_entry)}")
 
     def log_webhook_sent(self, rule_id: str, webhook_url: str, success: bool,
                         response_time: float = None, error: str = None) -> None:
@@ -59,7 +114,7 @@ class AlertLogger:
         }
 
         level = logging.INFO if success else logging.WARNING
-        self.logger.log(level, f"WEBHOOK_SENT: {json.dumps(log_entry)}")
+        self.logger.log(level, f"WEBHOOK_SENT: {_dumps(log_entry)}")
 
     def log_telegram_sent(self, rule_id: str, chat_id: str, success: bool,
                          message_length: int = None, error: str = None) -> None:
@@ -75,7 +130,7 @@ class AlertLogger:
         }
 
         level = logging.INFO if success else logging.WARNING
-        self.logger.log(level, f"TELEGRAM_SENT: {json.dumps(log_entry)}")
+        self.logger.log(level, f"TELEGRAM_SENT: {_dumps(log_entry)}")
 
     def log_rule_error(self, rule_id: str, error: str, context: Dict = None) -> None:
         """Log rule evaluation errors"""
@@ -87,27 +142,53 @@ class AlertLogger:
             'context': context or {}
         }
 
-        self.logger.error(f"RULE_ERROR: {json.dumps(log_entry)}")
+        self.logger.error(f"RULE_ERROR: {_dumps(log_entry)}")
+
+    def _scan_alert_lines(self, log_file: Path) -> Iterator[bytes]:
+        """Yield the JSON payload of every ALERT_TRIGGERED line in a log file"""
+        try:
+            with open(log_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find(ALERT_MARKER_BYTES)
+                while pos != -1:
+                    line_start = mm.rfind(b'\n', 0, pos) + 1
+                    line_end = mm.find(b'\n', pos)
+                    if line_end == -1:
+                        line_end = len(mm)
+
+                    if pos - line_start == ALERT_OFFSET:
+                        yield mm[pos + len(ALERT_MARKER_BYTES):line_end]
+                    pos = mm.find(ALERT_MARKER_BYTES, line_end)
+        except ValueError:
+            # mmap can't map empty files; fall back to plain line iteration
+            with open(log_file, 'r') as f:
+                for line in f:
+                    if line.startswith(ALERT_MARKER, ALERT_OFFSET):
+                        yield line[ALERT_OFFSET + len(ALERT_MARKER):]
 
     def get_alert_history(self, rule_id: str = None, days: int = 7) -> pd.DataFrame:
         """Get alert history for analysis"""
         start_date = datetime.now() - timedelta(days=days)
         all_logs = []
 
+        # Alerts logged just before this call may still be queued
+        self.flush()
+
         # Read log files for the period
         for log_file in self.log_dir.glob('alerts_*.log'):
             try:
-                with open(log_file, 'r') as f:
-                    for line in f:
-                        if 'ALERT_TRIGGERED' in line:
-                            # Parse the JSON part
-                            json_part = line.split('ALERT_TRIGGERED: ', 1)[1].strip()
-                            log_entry = json.loads(json_part)
-
-                            entry_time = datetime.fromisoformat(log_entry['timestamp'])
-                            if entry_time >= start_date:
-                                if rule_id is None or log_entry['rule_id'] == rule_id:
-                                    all_logs.append(log_entry)
+                # The name only records the day the file was opened (a long-running process keeps
+                # appending to it), but entries are appended in time order, so a file last written
+                # before the window can't hold anything inside it
+                if datetime.fromtimestamp(log_file.stat().st_mtime) < start_date:
+                    continue
+
+                for json_part in self._scan_alert_lines(log_file):
+                    log_entry = orjson.loads(json_part)
+
+                    if datetime.fromisoformat(log_entry['timestamp']) < start_date:
+                        continue
+                    if rule_id is None or log_entry['rule_id'] == rule_id:
+                        all_logs.append(log_entry)
             except Exception as e:
                 self.logger.warning(f"Error reading log file {log_file}: {e}")
 
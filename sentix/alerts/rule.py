@@ -1,9 +1,9 @@
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, Optional, Union
 from enum import Enum
+import operator
+import time
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import re
+from datetime import datetime
 
 class AlertCondition(Enum):
     GREATER_THAN = ">"
@@ -17,7 +17,34 @@ class AlertCondition(Enum):
     BETWEEN = "between"
     OUTSIDE = "outside"
 
+# Operator strings snapshotted once instead of Enum attribute lookups per use
+_GT = AlertCondition.GREATER_THAN.value
+_LT = AlertCondition.LESS_THAN.value
+_GE = AlertCondition.GREATER_EQUAL.value
+_LE = AlertCondition.LESS_EQUAL.value
+_EQ = AlertCondition.EQUAL.value
+_NE = AlertCondition.NOT_EQUAL.value
+_CROSS_ABOVE = AlertCondition.CROSS_ABOVE.value
+_CROSS_BELOW = AlertCondition.CROSS_BELOW.value
+_BETWEEN = AlertCondition.BETWEEN.value
+_OUTSIDE = AlertCondition.OUTSIDE.value
+
 class AlertRule:
+    # Operator string -> comparison. Cross conditions need historical data - simplified
+    # to plain threshold comparisons for now
+    _OPS: Dict[str, Callable[[Any, Any], bool]] = {
+        _GT: operator.gt,
+        _LT: operator.lt,
+        _GE: operator.ge,
+        _LE: operator.le,
+        _EQ: operator.eq,
+        _NE: operator.ne,
+        _BETWEEN: lambda x, v: v[0] <= x <= v[1],
+        _OUTSIDE: lambda x, v: x < v[0] or x > v[1],
+        _CROSS_ABOVE: operator.gt,
+        _CROSS_BELOW: operator.lt,
+    }
+
     def __init__(self, rule_id: str, name: str, ticker: str, conditions: List[Dict], actions: List[Dict],
                  enabled: bool = True, cooldown_minutes: int = 30):
         self.rule_id = rule_id
@@ -27,40 +54,78 @@ class AlertRule:
         self.actions = actions
         self.enabled = enabled
         self.cooldown_minutes = cooldown_minutes
+        # Wall-clock time for serialization; cooldown checks use the monotonic _triggered_at
         self.last_triggered: Optional[datetime] = None
 
-    def evaluate(self, data: pd.DataFrame, volatility_data: Optional[Dict] = None) -> bool:
-        """Evaluate if all conditions are met"""
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Any field change invalidates the memoized to_dict() output
+        if name != '_cached_dict':
+            object.__setattr__(self, '_cached_dict', None)
+        if name == 'cooldown_minutes':
+            object.__setattr__(self, 'cooldown_seconds', value * 60)
+        elif name == 'last_triggered':
+            # Map the wall-clock trigger time onto the monotonic clock (also for restored rules)
+            triggered_at = None
+            if value is not None:
+                triggered_at = time.monotonic() - (datetime.now() - value).total_seconds()
+            object.__setattr__(self, '_triggered_at', triggered_at)
+        object.__setattr__(self, name, value)
+
+    def evaluate(self, data: Union[pd.DataFrame, Dict[str, Dict[str, Any]]],
+                 volatility_data: Optional[Dict] = None) -> bool:
+        """Evaluate if all conditions are met on the ticker's latest bar
+
+        data is the sentiment bars DataFrame, or the latest bar per ticker already
+        computed by AlertEngine.precompute_latest.
+        """
+        if isinstance(data, pd.DataFrame):
+            ticker_rows = data[data['ticker'] == self.ticker]
+            if ticker_rows.empty:
+                return False
+            latest_data = ticker_rows.sort_values('bucket_start').iloc[-1].to_dict()
+        else:
+            latest_data = data.get(self.ticker)
+            if latest_data is None:
+                return False
+
+        return self.evaluate_latest(latest_data, volatility_data)
+
+    def evaluate_latest(self, latest_data: Dict[str, Any], volatility_data: Optional[Dict] = None) -> bool:
+        """Evaluate all conditions against the latest row already extracted for this ticker"""
         if not self.enabled:
             return False
 
         # Check cooldown
-        if self.last_triggered and (datetime.now() - self.last_triggered) < timedelta(minutes=self.cooldown_minutes):
+        if self.in_cooldown(time.monotonic()):
             return False
 
-        # Get latest data for ticker
-        if self.ticker not in data['ticker'].values:
-            return False
+        return self.conditions_met(latest_data, volatility_data)
 
-        latest_data = data[data['ticker'] == self.ticker].sort_values('bucket_start').iloc[-1]
+    def in_cooldown(self, now: float) -> bool:
+        """Check if the rule fired less than cooldown_minutes before now (time.monotonic())"""
+        return self._triggered_at is not None and (now - self._triggered_at) < self.cooldown_seconds
 
-        # Evaluate all conditions
+    def conditions_met(self, latest_data: Dict[str, Any], volatility_data: Optional[Dict] = None) -> bool:
+        """Evaluate all conditions, without the enabled/cooldown checks"""
+        # Read from the live conditions so in-place edits take effect, as in the engine's vectorized path
         for condition in self.conditions:
             if not self._evaluate_condition(condition, latest_data, volatility_data):
                 return False
 
         return True
 
-    def _evaluate_condition(self, condition: Dict, data: pd.Series, volatility_data: Optional[Dict]) -> bool:
+    def _evaluate_condition(self, condition: Dict, data: Dict[str, Any], volatility_data: Optional[Dict]) -> bool:
         """Evaluate a single condition"""
-        field = condition['field']
-        operator = condition['operator']
-        value = condition['value']
+        field = condition.get('field')
+        compare = self._OPS.get(condition.get('operator'))
+        value = condition.get('value')
+        if compare is None:
+            return False
 
         # Get field value
         if field == 'volatility' and volatility_data:
             field_value = volatility_data.get(self.ticker, 0)
-        elif field in data.index:
+        elif field in data:
             field_value = data[field]
         else:
             return False
@@ -69,28 +134,7 @@ class AlertRule:
         if pd.isna(field_value):
             return False
 
-        # Evaluate based on operator
-        if operator == AlertCondition.GREATER_THAN.value:
-            return field_value > value
-        elif operator == AlertCondition.LESS_THAN.value:
-            return field_value < value
-        elif operator == AlertCondition.GREATER_EQUAL.value:
-            return field_value >= value
-        elif operator == AlertCondition.LESS_EQUAL.value:
-            return field_value <= value
-        elif operator == AlertCondition.EQUAL.value:
-            return field_value == value
-        elif operator == AlertCondition.NOT_EQUAL.value:
-            return field_value != value
-        elif operator == AlertCondition.BETWEEN.value:
-            return value[0] <= field_value <= value[1]
-        elif operator == AlertCondition.OUTSIDE.value:
-            return field_value < value[0] or field_value > value[1]
-        elif operator in [AlertCondition.CROSS_ABOVE.value, AlertCondition.CROSS_BELOW.value]:
-            # For cross conditions, we need historical data - simplified for now
-            return field_value > value if operator == AlertCondition.CROSS_ABOVE.value else field_value < value
-
-        return False
+        return compare(field_value, value)
 
     def trigger(self) -> List[Dict]:
         """Trigger the alert and return actions to execute"""
@@ -98,8 +142,12 @@ class AlertRule:
         return self.actions
 
     def to_dict(self) -> Dict:
-        """Convert rule to dictionary for serialization"""
-        return {
+        """Convert rule to dictionary for serialization (memoized until the rule changes)"""
+        # Callers get a shallow copy so edits to the returned dict can't leak into the memo
+        if self._cached_dict is not None:
+            return dict(self._cached_dict)
+
+        self._cached_dict = {
             'rule_id': self.rule_id,
             'name': self.name,
             'ticker': self.ticker,
@@ -109,6 +157,7 @@ class AlertRule:
             'cooldown_minutes': self.cooldown_minutes,
             'last_triggered': self.last_triggered.isoformat() if self.last_triggered else None
         }
+        return dict(self._cached_dict)
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'AlertRule':
@@ -1,37 +1,174 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
-from typing import Dict, Any, Optional, List
+import random
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
+from urllib.parse import urlparse
 import asyncio
+import threading
+import time
+import weakref
 from concurrent.futures import ThreadPoolExecutor
 import aiohttp
 
 logger = logging.getLogger(__name__)
 
+class TokenBucket:
+    """Thread-safe token bucket shared by the sync and async delivery paths"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
 class WebhookManager:
-    def __init__(self, timeout: int = 10, max_retries: int = 3):
+    def __init__(self, timeout: int = 10, max_retries: int = 3, max_concurrency: int = 32,
+                 host_rate: float = 10.0, host_burst: int = 10,
+                 base_backoff: float = 1.0, max_backoff: float = 30.0):
         self.timeout = timeout
         self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
         self.executor = ThreadPoolExecutor(max_workers=10)
 
+        # Per-host outbound rate limit (requests/second with a small burst)
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self._limiters: Dict[str, TokenBucket] = {}
+        self._limiters_lock = threading.Lock()
+
+        # Long-lived aiohttp session per event loop for async deliveries, created on first use
+        self._async_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+        # asyncio primitives bind to the loop that first waits on them, so each running loop
+        # gets its own (semaphore capping in-flight deliveries, lock guarding the session)
+        self._loop_primitives: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[asyncio.Semaphore, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+        self._loop_primitives_lock = threading.Lock()
+
+        # Keep-alive connection pool shared by all sync deliveries; the adapter only
+        # retries failed connects, status/timeouts are handled by the loop below
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=None, connect=2, read=0, status=0, backoff_factor=0.2)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _primitives(self) -> Tuple[asyncio.Semaphore, asyncio.Lock]:
+        """Concurrency semaphore and session lock for the running loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        with self._loop_primitives_lock:
+            primitives = self._loop_primitives.get(loop)
+            if primitives is None:
+                primitives = (asyncio.Semaphore(self.max_concurrency), asyncio.Lock())
+                self._loop_primitives[loop] = primitives
+        return primitives
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the running loop's aiohttp session, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        _, session_lock = self._primitives()
+        async with session_lock:
+            session = self._async_sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.max_concurrency,
+                    limit_per_host=64,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=30
+                )
+                session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                )
+                with self._loop_primitives_lock:
+                    # Sessions of loops that have since closed have nothing left to serve
+                    stale = [old for old_loop, old in self._async_sessions.items() if old_loop.is_closed()]
+                    self._async_sessions = {
+                        old_loop: old for old_loop, old in self._async_sessions.items() if not old_loop.is_closed()
+                    }
+                    self._async_sessions[loop] = session
+                for old in stale:
+                    # Their transports went with the loop; this only marks the connector closed
+                    await old.close()
+        return session
+
+    async def close(self) -> None:
+        """Close pooled HTTP connections"""
+        loop = asyncio.get_running_loop()
+        with self._loop_primitives_lock:
+            sessions, self._async_sessions = self._async_sessions, {}
+        for session_loop, session in sessions.items():
+            if session.closed:
+                continue
+            if session_loop is not loop and session_loop.is_running():
+                # A session must be closed on the loop that owns its connections
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), session_loop))
+            else:
+                await session.close()
+        self.session.close()
+
+    def _limiter(self, url: str) -> TokenBucket:
+        """Token bucket for the url's host, created on first use"""
+        host = urlparse(url).netloc
+        with self._limiters_lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = TokenBucket(self.host_rate, self.host_burst)
+        return limiter
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff so concurrent failures don't retry in lockstep"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def _retry_delay(self, attempt: int, status: Optional[int], headers: Any) -> float:
+        """Delay before the next attempt, honouring Retry-After on 429/503"""
+        delay = self._backoff(attempt)
+        if status in (429, 503):
+            try:
+                delay = min(self.max_backoff, max(0.0, float(headers.get('Retry-After', delay))))
+            except (TypeError, ValueError):
+                # HTTP-date form isn't worth parsing here
+                pass
+        return delay
+
     async def send_webhook_async(self, url: str, payload: Dict[str, Any], headers: Optional[Dict] = None) -> bool:
         """Send webhook asynchronously"""
         headers = headers or {'Content-Type': 'application/json'}
 
         for attempt in range(self.max_retries):
+            status, response_headers = None, None
             try:
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                    async with session.post(url, json=payload, headers=headers) as response:
-                        if response.status in [200, 201, 202]:
-                            logger.info(f"Webhook sent successfully to {url}: {response.status}")
-                            return True
-                        else:
-                            logger.warning(f"Webhook failed to {url}: {response.status} - {await response.text()}")
+                await asyncio.sleep(self._limiter(url).reserve())
+                session = await self._get_session()
+                async with session.post(url, json=payload, headers=headers) as response:
+                    if response.status in [200, 201, 202]:
+                        logger.info(f"Webhook sent successfully to {url}: {response.status}")
+                        return True
+                    else:
+                        status, response_headers = response.status, response.headers
+                        logger.warning(f"Webhook failed to {url}: {response.status} - {await response.text()}")
             except Exception as e:
                 logger.error(f"Webhook error to {url} (attempt {attempt + 1}): {str(e)}")
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(1 * (attempt + 1))  # Exponential backoff
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(self._retry_delay(attempt, status, response_headers))
 
         return False
 
@@ -40,18 +177,20 @@ class WebhookManager:
         headers = headers or {'Content-Type': 'application/json'}
 
         for attempt in range(self.max_retries):
+            status, response_headers = None, None
             try:
-                response = requests.post(url, json=payload, headers=headers, timeout=self.timeout)
+                time.sleep(self._limiter(url).reserve())
+                response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
                 if response.status_code in [200, 201, 202]:
                     logger.info(f"Webhook sent successfully to {url}: {response.status_code}")
                     return True
                 else:
+                    status, response_headers = response.status_code, response.headers
                     logger.warning(f"Webhook failed to {url}: {response.status_code} - {response.text}")
             except Exception as e:
                 logger.error(f"Webhook error to {url} (attempt {attempt + 1}): {str(e)}")
-                if attempt < self.max_retries - 1:
-                    import time
-                    time.sleep(1 * (attempt + 1))  # Exponential backoff
+            if attempt < self.max_retries - 1:
+                time.sleep(self._retry_delay(attempt, status, response_headers))
 
         return False
 
@@ -65,6 +204,16 @@ class WebhookManager:
 
         return self.send_webhook_sync(webhook_url, payload)
 
+    async def send_trading_signal_async(self, webhook_url: str, signal_data: Dict[str, Any]) -> bool:
+        """Send trading signal without blocking the event loop"""
+        payload = {
+            'timestamp': datetime.now().isoformat(),
+            'type': 'trading_signal',
+            'signal': signal_data
+        }
+
+        return await self._guarded(webhook_url, payload)
+
     def send_alert_notification(self, webhook_url: str, alert_data: Dict[str, Any]) -> bool:
         """Send alert notification"""
         payload = {
@@ -75,15 +224,28 @@ class WebhookManager:
 
         return self.send_webhook_sync(webhook_url, payload)
 
+    async def send_alert_notification_async(self, webhook_url: str, alert_data: Dict[str, Any]) -> bool:
+        """Send alert notification without blocking the event loop"""
+        payload = {
+            'timestamp': datetime.now().isoformat(),
+            'type': 'alert',
+            'alert': alert_data
+        }
+
+        return await self._guarded(webhook_url, payload)
+
+    async def _guarded(self, url: str, payload: Dict[str, Any], headers: Optional[Dict] = None) -> bool:
+        """Send a webhook once a concurrency slot is free"""
+        semaphore, _ = self._primitives()
+        async with semaphore:
+            return await self.send_webhook_async(url, payload, headers)
+
     async def send_batch_webhooks(self, webhooks: List[Dict[str, Any]]) -> List[bool]:
-        """Send multiple webhooks asynchronously"""
-        tasks = []
-        for webhook in webhooks:
-            url = webhook['url']
-            payload = webhook['payload']
-            headers = webhook.get('headers')
-
-            tasks.append(self.send_webhook_async(url, payload, headers))
+        """Send multiple webhooks asynchronously, at most max_concurrency at a time"""
+        tasks = [
+            self._guarded(webhook['url'], webhook['payload'], webhook.get('headers'))
+            for webhook in webhooks
+        ]
 
         return await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -1,9 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.middleware.gzip import GZipMiddleware
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import asyncio
+import threading
+import uuid
 import yaml
 from sentiment.finbert import FinBertSentiment
 from models.prob_model import ProbModel
@@ -22,7 +30,8 @@ sentry_sdk.init(
     profiles_sample_rate=1.0,
 )
 
-app = FastAPI()
+# orjson encodes response bodies in C (large /historical payloads)
+app = FastAPI(default_response_class=ORJSONResponse)
 app.include_router(auth_router, tags=["auth"])
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -45,6 +54,20 @@ model_id = config['sentiment']['model_id']
 batch_size = config['sentiment']['batch_size']
 device = config['sentiment'].get('device')
 threshold_long = config['signals']['threshold_long']
+
+
+@dataclass(frozen=True, slots=True)
+class SignalsConfig:
+    """Signal thresholds, parsed once at startup instead of per request"""
+    threshold_long: float
+    threshold_short: float
+
+
+signals_config = SignalsConfig(
+    threshold_long=float(config['signals']['threshold_long']),
+    threshold_short=float(config['signals']['threshold_short'])
+)
+
 # Allow overriding API credentials via environment variables
 api_username = os.getenv('API_USERNAME', config['api']['auth']['username'])
 api_password = os.getenv('API_PASSWORD', config['api']['auth']['password'])
@@ -64,6 +87,183 @@ alert_engine = AlertEngine()
 if config.get('alerts', {}).get('enabled', False):
     alert_engine.start_monitoring(config['alerts'].get('monitoring_interval', 60))
 
+@app.on_event("shutdown")
+async def shutdown():
+    await alert_engine.webhook_manager.close()
+    # Flush queued alert log records before the process exits
+    alert_engine.logger.close()
+    if _SCORE_WORKER is not None:
+        _SCORE_WORKER.cancel()
+
+# Sentiment bars: Parquet is the serving format, the CSV is read while it is newer
+SENTIMENT_BARS_PARQUET = 'data/sentiment_bars.parquet'
+SENTIMENT_BARS_CSV = 'data/sentiment_bars.csv'
+BAR_FLOAT_COLUMNS = ['mean_sent', 'std_sent', 'min_sent', 'max_sent', 'unc_mean', 'time_decay_mean']
+BAR_RECORD_COLUMNS = ['ticker', 'bucket_start', 'mean_sent', 'std_sent', 'min_sent',
+                      'max_sent', 'count', 'unc_mean', 'time_decay_mean']
+
+_BARS_CACHE = {'source': None, 'df': None, 'latest': None, 'sorted': None, 'by_ticker': None}
+_BARS_LOCK = threading.Lock()
+
+# prob_up per (ticker, bucket_start); cleared whenever the bars are re-read
+_PRED_CACHE: "OrderedDict[Tuple[str, pd.Timestamp], float]" = OrderedDict()
+_PRED_CACHE_SIZE = 1024
+_PRED_LOCK = threading.Lock()
+
+# /score_text requests arriving within this window share one FinBERT forward pass
+SCORE_BATCH_MAX_WAIT = 0.01
+_SCORE_QUEUE: Optional[asyncio.Queue] = None
+_SCORE_QUEUE_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SCORE_WORKER: Optional[asyncio.Task] = None
+
+# Background /alerts/process runs by job id; oldest finished jobs are evicted first
+_ALERT_JOBS: "OrderedDict[str, Dict]" = OrderedDict()
+_ALERT_JOBS_SIZE = 256
+_ALERT_JOBS_LOCK = threading.Lock()
+
+
+def _bars_csv_types(bucket_type: pa.DataType) -> Dict[str, pa.DataType]:
+    """Explicit Arrow types for the known bar columns; extra columns are still inferred"""
+    types = {'ticker': pa.string(), 'bucket_start': bucket_type, 'count': pa.int64()}
+    types.update({col: pa.float64() for col in BAR_FLOAT_COLUMNS})
+    return types
+
+
+def _read_bars_csv() -> pd.DataFrame:
+    """Read the sentiment bars CSV with the threaded Arrow CSV reader (no pandas parse)"""
+    read_options = pa_csv.ReadOptions(use_threads=True)
+    try:
+        # Bars are written by features.aggregate with UTC offsets
+        table = pa_csv.read_csv(
+            SENTIMENT_BARS_CSV, read_options=read_options,
+            convert_options=pa_csv.ConvertOptions(column_types=_bars_csv_types(pa.timestamp('ns', tz='UTC')))
+        )
+    except pa.ArrowInvalid:
+        # Older files carry naive timestamps
+        table = pa_csv.read_csv(
+            SENTIMENT_BARS_CSV, read_options=read_options,
+            convert_options=pa_csv.ConvertOptions(column_types=_bars_csv_types(pa.timestamp('ns')))
+        )
+    return table.to_pandas()
+
+
+def load_bars() -> Optional[pd.DataFrame]:
+    """Sentiment bars, cached in-process and re-read only when the file changes"""
+    with _BARS_LOCK:
+        csv_exists = os.path.exists(SENTIMENT_BARS_CSV)
+        parquet_exists = os.path.exists(SENTIMENT_BARS_PARQUET)
+        if not csv_exists and not parquet_exists:
+            return None
+
+        # Producers that only write the CSV leave the Parquet copy stale; only
+        # features.aggregate writes the Parquet, the API just reads the newer file
+        if csv_exists and (not parquet_exists or
+                           os.path.getmtime(SENTIMENT_BARS_CSV) > os.path.getmtime(SENTIMENT_BARS_PARQUET)):
+            path = SENTIMENT_BARS_CSV
+        else:
+            path = SENTIMENT_BARS_PARQUET
+
+        source = (path, os.path.getmtime(path))
+        if _BARS_CACHE['df'] is None or source != _BARS_CACHE['source']:
+            df = _read_bars_csv() if path == SENTIMENT_BARS_CSV else pd.read_parquet(path)
+            sorted_df = df.sort_values('bucket_start', kind='stable').reset_index(drop=True)
+            _BARS_CACHE['df'] = df
+            _BARS_CACHE['sorted'] = sorted_df
+            # Per-ticker partitions (still sorted by bucket_start) so ticker filters touch only that ticker's rows
+            _BARS_CACHE['by_ticker'] = {
+                ticker: group.reset_index(drop=True)
+                for ticker, group in sorted_df.groupby('ticker', sort=False)
+            }
+            # Last bar per ticker, indexed by ticker for O(1) lookups
+            _BARS_CACHE['latest'] = (
+                sorted_df.groupby('ticker', sort=False).tail(1)
+                .set_index('ticker', drop=False)
+                .sort_index()
+            )
+            _BARS_CACHE['source'] = source
+            with _PRED_LOCK:
+                _PRED_CACHE.clear()
+        return _BARS_CACHE['df']
+
+
+def load_latest_bars() -> Optional[pd.DataFrame]:
+    """Latest sentiment bar per ticker, indexed by ticker"""
+    if load_bars() is None:
+        return None
+    return _BARS_CACHE['latest']
+
+
+def load_sorted_bars() -> Optional[pd.DataFrame]:
+    """Sentiment bars sorted by bucket_start, for range slicing"""
+    if load_bars() is None:
+        return None
+    return _BARS_CACHE['sorted']
+
+
+def load_ticker_bars(ticker: str) -> Optional[pd.DataFrame]:
+    """Sentiment bars for one ticker sorted by bucket_start (empty if the ticker has none)"""
+    if load_bars() is None:
+        return None
+    bars = _BARS_CACHE['by_ticker'].get(ticker)
+    if bars is None:
+        return _BARS_CACHE['sorted'].iloc[:0]
+    return bars
+
+
+def _bars_to_records(df: pd.DataFrame) -> List[Dict]:
+    """Convert bars to JSON-ready dicts column-wise instead of row by row"""
+    bucket_start = df['bucket_start']
+    iso = bucket_start.dt.strftime('%Y-%m-%dT%H:%M:%S')
+    if bucket_start.dt.tz is not None:
+        offset = bucket_start.dt.strftime('%z')
+        iso = iso + offset.str[:3] + ':' + offset.str[3:]
+
+    std_sent = df['std_sent'].astype(object)
+    records = df[BAR_RECORD_COLUMNS].assign(
+        bucket_start=iso.astype(object),
+        std_sent=std_sent.where(std_sent.notna(), None)
+    )
+    return records.to_dict('records')
+
+
+def _predict_prob_up(last_row: pd.Series) -> float:
+    """Model probability for a ticker's latest bar, memoized until the bar changes"""
+    if not model:
+        return 0.5
+
+    key = (last_row['ticker'], last_row['bucket_start'])
+    with _PRED_LOCK:
+        if key in _PRED_CACHE:
+            _PRED_CACHE.move_to_end(key)
+            return _PRED_CACHE[key]
+
+    feature_cols = getattr(model, 'feature_cols', None)
+    if feature_cols:
+        # Build the float row directly instead of transposing an object Series and reindexing
+        values = np.asarray(
+            [[last_row[col] if col in last_row.index else 0 for col in feature_cols]],
+            dtype=np.float64
+        )
+        features = pd.DataFrame(values, columns=feature_cols)
+    else:
+        features = last_row.to_frame().T
+    prob_up = float(model.predict_proba(features)[0])
+
+    with _PRED_LOCK:
+        _PRED_CACHE[key] = prob_up
+        if len(_PRED_CACHE) > _PRED_CACHE_SIZE:
+            _PRED_CACHE.popitem(last=False)
+    return prob_up
+
+
+def _as_bucket_time(value: str, buckets: pd.Series) -> pd.Timestamp:
+    """Parse a date filter, matching the timezone of bucket_start"""
+    ts = pd.to_datetime(value)
+    tz = getattr(buckets.dtype, 'tz', None)
+    if tz is not None and ts.tzinfo is None:
+        ts = ts.tz_localize(tz)
+    return ts
+
 class ScoreTextRequest(BaseModel):
     text: str
     ticker: str
@@ -82,30 +282,82 @@ class WebhookRequest(BaseModel):
     headers: Optional[Dict] = None
     enabled: bool = True
 
-@app.post("/score_text")
-def score_text(request: ScoreTextRequest, current_user: User = Depends(get_current_active_user)):
-    text = request.text
-    if not text.strip():
-        return {"prob_up": 0.5, "components": {"pos": 0, "neg": 0, "neu": 1, "score": 0}}
-
-    sentiment = finbert.predict_batch([text]).iloc[0]
-    pos, neg, neu, score = sentiment['pos'], sentiment['neg'], sentiment['neu'], sentiment['score']
+def _score_batch(texts: List[str]) -> List[tuple]:
+    """Score texts with one FinBERT call and one model call, returning (prob_up, pos, neg, neu, score) rows"""
+    sentiment = finbert.predict_batch(texts)
+    score = sentiment['score'].to_numpy(dtype=np.float64)
+    neu = sentiment['neu'].to_numpy(dtype=np.float64)
 
     if model:
         # Approximate features: use score as mean_sent, etc.
-        dummy_features = pd.DataFrame({
-            'mean_sent': [score],
-            'std_sent': [0],
-            'min_sent': [score],
-            'max_sent': [score],
-            'count': [1],
-            'unc_mean': [neu],
-            'time_decay_mean': [score]
+        features = pd.DataFrame({
+            'mean_sent': score,
+            'std_sent': 0,
+            'min_sent': score,
+            'max_sent': score,
+            'count': 1,
+            'unc_mean': neu,
+            'time_decay_mean': score
         })
-        prob_up = model.predict_proba(dummy_features)[0]
+        prob_up = model.predict_proba(features)
     else:
         prob_up = (score + 1) / 2  # normalize to 0-1
 
+    return list(zip(prob_up, sentiment['pos'], sentiment['neg'], neu, score))
+
+
+async def _score_batch_worker(queue: asyncio.Queue) -> None:
+    """Drain queued texts into micro-batches and score each batch in one executor call"""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        try:
+            deadline = loop.time() + SCORE_BATCH_MAX_WAIT
+            while len(items) < batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            rows = await loop.run_in_executor(None, _score_batch, [text for text, _ in items])
+            for (_, future), row in zip(items, rows):
+                if not future.done():
+                    future.set_result(row)
+        except asyncio.CancelledError:
+            for _, future in items:
+                future.cancel()
+            raise
+        except Exception as e:
+            # Fail this batch's requests and keep serving the queue
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+
+def _score_queue() -> asyncio.Queue:
+    """Queue feeding the batch worker, (re)started for the running loop"""
+    global _SCORE_QUEUE, _SCORE_QUEUE_LOOP, _SCORE_WORKER
+    loop = asyncio.get_running_loop()
+    if _SCORE_QUEUE is None or _SCORE_QUEUE_LOOP is not loop:
+        _SCORE_QUEUE = asyncio.Queue()
+        _SCORE_QUEUE_LOOP = loop
+        _SCORE_WORKER = loop.create_task(_score_batch_worker(_SCORE_QUEUE))
+    return _SCORE_QUEUE
+
+
+@app.post("/score_text")
+async def score_text(request: ScoreTextRequest, current_user: User = Depends(get_current_active_user)):
+    text = request.text
+    if not text.strip():
+        return {"prob_up": 0.5, "components": {"pos": 0, "neg": 0, "neu": 1, "score": 0}}
+
+    future = asyncio.get_running_loop().create_future()
+    await _score_queue().put((text, future))
+    prob_up, pos, neg, neu, score = await future
+
     return {
         "prob_up": float(prob_up),
         "components": {
@@ -119,27 +371,19 @@ def score_text(request: ScoreTextRequest, current_user: User = Depends(get_curre
 @app.get("/signal")
 def get_signal(ticker: str, threshold_long: float = None, threshold_short: float = None, current_user: User = Depends(get_current_active_user)):
     if threshold_long is None:
-        threshold_long = config['signals']['threshold_long']
+        threshold_long = signals_config.threshold_long
     if threshold_short is None:
-        threshold_short = config['signals']['threshold_short']
+        threshold_short = signals_config.threshold_short
 
-    if not os.path.exists('data/sentiment_bars.csv'):
+    latest = load_latest_bars()
+    if latest is None:
         raise HTTPException(status_code=404, detail="Sentiment bars not found")
-
-    df = pd.read_csv('data/sentiment_bars.csv')
-    df['bucket_start'] = pd.to_datetime(df['bucket_start'])
-    last_row = df[df['ticker'] == ticker].sort_values('bucket_start').iloc[-1] if not df[df['ticker'] == ticker].empty else None
+    last_row = latest.loc[ticker] if ticker in latest.index else None
 
     if last_row is None:
         raise HTTPException(status_code=404, detail=f"No data for ticker {ticker}")
 
-    if model:
-        features = last_row.to_frame().T
-        if getattr(model, 'feature_cols', None):
-            features = features.reindex(columns=model.feature_cols, fill_value=0)
-        prob_up = model.predict_proba(features)[0]
-    else:
-        prob_up = 0.5  # default
+    prob_up = _predict_prob_up(last_row)
 
     if prob_up > threshold_long:
         decision = "long"
@@ -160,25 +404,15 @@ def get_signal(ticker: str, threshold_long: float = None, threshold_short: float
 @app.get("/probabilities")
 def get_probabilities(ticker: str, current_user: User = Depends(get_current_active_user)):
     """Consultar probabilidades quantificadas de subir/descer para um ticker."""
-    if not os.path.exists('data/sentiment_bars.csv'):
+    latest = load_latest_bars()
+    if latest is None:
         raise HTTPException(status_code=404, detail="Sentiment bars not found")
 
-    df = pd.read_csv('data/sentiment_bars.csv')
-    df['bucket_start'] = pd.to_datetime(df['bucket_start'])
-
-    df_ticker = df[df['ticker'] == ticker]
-    if df_ticker.empty:
+    if ticker not in latest.index:
         raise HTTPException(status_code=404, detail=f"No data for ticker {ticker}")
 
-    last_row = df_ticker.sort_values('bucket_start').iloc[-1]
-    features_df = last_row.to_frame().T
-
-    if model:
-        if getattr(model, 'feature_cols', None):
-            features_df = features_df.reindex(columns=model.feature_cols, fill_value=0)
-        prob_up = float(model.predict_proba(features_df)[0])
-    else:
-        prob_up = 0.5
+    last_row = latest.loc[ticker]
+    prob_up = _predict_prob_up(last_row)
 
     prob_down = 1.0 - prob_up
 
@@ -197,12 +431,12 @@ def get_probabilities(ticker: str, current_user: User = Depends(get_current_acti
     try:
         if model and getattr(model, 'feature_cols', None):
             for col in model.feature_cols:
-                model_features[col] = float(features_df[col].iloc[0]) if col in features_df.columns else 0.0
+                model_features[col] = float(last_row[col]) if col in last_row.index else 0.0
         else:
             # Fallback: usar as principais features do arquivo
             for col in ["mean_sent", "std_sent", "min_sent", "max_sent", "count", "unc_mean", "time_decay_mean"]:
-                if col in features_df.columns:
-                    model_features[col] = float(features_df[col].iloc[0])
+                if col in last_row.index:
+                    model_features[col] = float(last_row[col])
     except Exception:
         model_features = {}
 
@@ -217,68 +451,33 @@ def get_probabilities(ticker: str, current_user: User = Depends(get_current_acti
 
 @app.get("/realtime")
 def get_realtime(ticker: str = None, current_user: User = Depends(get_current_active_user)):
-    if not os.path.exists('data/sentiment_bars.csv'):
+    latest = load_latest_bars()
+    if latest is None:
         raise HTTPException(status_code=404, detail="Sentiment bars not found")
 
-    df = pd.read_csv('data/sentiment_bars.csv')
-    df['bucket_start'] = pd.to_datetime(df['bucket_start'])
-
+    # Latest bar for each ticker
     if ticker:
-        df = df[df['ticker'] == ticker]
-
-    # Get latest for each ticker
-    latest = df.sort_values('bucket_start').groupby('ticker').last().reset_index()
-
-    result = []
-    for _, row in latest.iterrows():
-        result.append({
-            "ticker": row['ticker'],
-            "bucket_start": row['bucket_start'].isoformat(),
-            "mean_sent": float(row['mean_sent']),
-            "std_sent": float(row['std_sent']) if pd.notna(row['std_sent']) else None,
-            "min_sent": float(row['min_sent']),
-            "max_sent": float(row['max_sent']),
-            "count": int(row['count']),
-            "unc_mean": float(row['unc_mean']),
-            "time_decay_mean": float(row['time_decay_mean'])
-        })
+        latest = latest.loc[[ticker]] if ticker in latest.index else latest.iloc[0:0]
+
+    result = _bars_to_records(latest)
 
     return {"data": result}
 
 @app.get("/historical")
 def get_historical(ticker: str = None, start_date: str = None, end_date: str = None, current_user: User = Depends(get_current_active_user)):
-    if not os.path.exists('data/sentiment_bars.csv'):
+    df = load_ticker_bars(ticker) if ticker else load_sorted_bars()
+    if df is None:
         raise HTTPException(status_code=404, detail="Sentiment bars not found")
 
-    df = pd.read_csv('data/sentiment_bars.csv')
-    df['bucket_start'] = pd.to_datetime(df['bucket_start'])
-
-    if ticker:
-        df = df[df['ticker'] == ticker]
-
+    # Date range via binary search on the pre-sorted bars
+    lo, hi = 0, len(df)
     if start_date:
-        start = pd.to_datetime(start_date)
-        df = df[df['bucket_start'] >= start]
-
+        lo = df['bucket_start'].searchsorted(_as_bucket_time(start_date, df['bucket_start']), side='left')
     if end_date:
-        end = pd.to_datetime(end_date)
-        df = df[df['bucket_start'] <= end]
-
-    df = df.sort_values('bucket_start')
-
-    result = []
-    for _, row in df.iterrows():
-        result.append({
-            "ticker": row['ticker'],
-            "bucket_start": row['bucket_start'].isoformat(),
-            "mean_sent": float(row['mean_sent']),
-            "std_sent": float(row['std_sent']) if pd.notna(row['std_sent']) else None,
-            "min_sent": float(row['min_sent']),
-            "max_sent": float(row['max_sent']),
-            "count": int(row['count']),
-            "unc_mean": float(row['unc_mean']),
-            "time_decay_mean": float(row['time_decay_mean'])
-        })
+        hi = df['bucket_start'].searchsorted(_as_bucket_time(end_date, df['bucket_start']), side='right')
+    df = df.iloc[lo:hi]
+
+    result = _bars_to_records(df)
 
     return {"data": result, "count": len(result)}
 
@@ -372,23 +571,52 @@ def delete_webhook(webhook_url: str, current_user: User = Depends(get_current_ac
 
 # Alert Monitoring Endpoints
 
-@app.post("/alerts/process")
-def process_alerts(current_user: User = Depends(get_current_active_user)):
-    """Manually process alerts (for testing)"""
-    if not os.path.exists('data/sentiment_bars.csv'):
-        raise HTTPException(status_code=404, detail="Sentiment bars not found")
+def _set_alert_job(job_id: str, job: Dict) -> None:
+    with _ALERT_JOBS_LOCK:
+        _ALERT_JOBS[job_id] = job
+        _ALERT_JOBS.move_to_end(job_id)
+        while len(_ALERT_JOBS) > _ALERT_JOBS_SIZE:
+            _ALERT_JOBS.popitem(last=False)
 
-    df = pd.read_csv('data/sentiment_bars.csv')
-    df['bucket_start'] = pd.to_datetime(df['bucket_start'])
 
-    triggered_alerts = alert_engine.process_alerts(df)
-    if triggered_alerts:
-        alert_engine.execute_actions(triggered_alerts)
+def _run_alerts_job(job_id: str, df: pd.DataFrame) -> None:
+    """Evaluate rules and run their actions outside the request, recording the outcome"""
+    try:
+        triggered_alerts = alert_engine.process_alerts(df)
+        if triggered_alerts:
+            alert_engine.execute_actions(triggered_alerts)
+    except Exception as e:
+        _set_alert_job(job_id, {"job_id": job_id, "status": "failed", "error": str(e)})
+        return
 
-    return {
+    _set_alert_job(job_id, {
+        "job_id": job_id,
+        "status": "done",
         "message": f"Processed {len(triggered_alerts)} alerts",
         "triggered_rules": [alert['rule'].rule_id for alert in triggered_alerts]
-    }
+    })
+
+@app.post("/alerts/process")
+def process_alerts(background_tasks: BackgroundTasks, current_user: User = Depends(get_current_active_user)):
+    """Manually process alerts (for testing); returns a job id to poll"""
+    df = load_bars()
+    if df is None:
+        raise HTTPException(status_code=404, detail="Sentiment bars not found")
+
+    job_id = uuid.uuid4().hex
+    _set_alert_job(job_id, {"job_id": job_id, "status": "pending"})
+    background_tasks.add_task(_run_alerts_job, job_id, df)
+
+    return {"job_id": job_id, "status": "pending"}
+
+@app.get("/alerts/process/{job_id}")
+def get_alerts_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Status and result of a background alert processing job"""
+    with _ALERT_JOBS_LOCK:
+        job = _ALERT_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @app.get("/alerts/stats")
 def get_alert_stats(current_user: User = Depends(get_current_active_user)):
@@ -8,6 +8,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import os
+import asyncio
+import importlib.util
 import httpx
 from datetime import datetime
 
@@ -16,6 +18,13 @@ from datetime import datetime
 # =============================================================================
 
 HF_SPACE_URL = os.environ.get("HF_SPACE_URL", "https://your-username-sentix-finbert.hf.space")
+HF_TIMEOUT = 30
+
+# Max concurrent Space calls per batch request
+BATCH_CONCURRENCY = 4
+
+# Shared client: keep-alive (and HTTP/2 multiplexing when h2 is installed) across requests
+_HTTP: Optional[httpx.AsyncClient] = None
 
 app = FastAPI(
     title="Sentix API Light",
@@ -56,18 +65,35 @@ class SentimentResponse(BaseModel):
 # HuggingFace Client
 # =============================================================================
 
+def _label_probabilities(probs: Dict[str, Any]) -> Dict[str, float]:
+    """Read label probabilities from a raw dict or a gr.Label payload."""
+    if "confidences" in probs:
+        return {c["label"]: c["confidence"] for c in probs["confidences"]}
+    return probs
+
+
+async def _client() -> httpx.AsyncClient:
+    """Return the shared HTTP client for the Space, creating it on first use."""
+    global _HTTP
+    if _HTTP is None:
+        _HTTP = httpx.AsyncClient(
+            base_url=HF_SPACE_URL,
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=HF_TIMEOUT,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        )
+    return _HTTP
+
+
 async def analyze_with_hf(text: str) -> Dict[str, Any]:
     """Call HuggingFace Space API."""
     try:
-        from gradio_client import Client
+        client = await _client()
+        response = await client.post("/api/predict", json={"data": [text]})
+        response.raise_for_status()
         
-        client = Client(HF_SPACE_URL)
-        result = client.predict(
-            text=text,
-            api_name="/predict"
-        )
-        
-        probs, label, score = result
+        probs, label, score = response.json()["data"]
+        probs = _label_probabilities(probs)
         
         return {
             "text": text,
@@ -95,6 +121,15 @@ async def analyze_with_hf(text: str) -> Dict[str, Any]:
 # Endpoints
 # =============================================================================
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Close pooled connections to the Space."""
+    global _HTTP
+    if _HTTP is not None:
+        await _HTTP.aclose()
+        _HTTP = None
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -138,13 +173,16 @@ async def predict_batch(input: BatchInput):
     
     texts = input.texts[:10]  # Limit
     
-    results = []
-    for text in texts:
-        if text.strip():
-            result = await analyze_with_hf(text)
-            results.append(result)
+    # Fan out to the Space concurrently, a few calls at a time
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def analyze_one(text: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await analyze_with_hf(text)
+    
+    results = await asyncio.gather(*[analyze_one(text) for text in texts if text.strip()])
     
-    return {"results": results, "count": len(results)}
+    return {"results": list(results), "count": len(results)}
 
 
 @app.get("/stats")
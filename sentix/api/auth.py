@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import functools
+import time
 from fastapi import Depends, APIRouter, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
@@ -67,6 +69,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+@functools.lru_cache(maxsize=1024)
+def _decode_token(token: str) -> Tuple[Optional[str], float]:
+    """Verify a token's signature once; returns (subject, expiry). Invalid tokens raise and aren't cached."""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    return payload.get("sub"), float(payload.get("exp", float("inf")))
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,9 +82,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+        # Repeat callers hit the memoized decision; expiry is still checked every time
+        username, expires_at = _decode_token(token)
+        if username is None or expires_at <= time.time():
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
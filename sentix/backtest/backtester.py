@@ -5,13 +5,17 @@ This module provides backtesting functionality for evaluating the performance
 of sentiment-based trading strategies with comprehensive metrics.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import atexit
+import threading
 import pandas as pd
 import numpy as np
-from sklearn.metrics import roc_auc_score, brier_score_loss
-import matplotlib.pyplot as plt
-import re
+from scipy.stats import rankdata
+from matplotlib.figure import Figure
 import logging
+import os
 
 from models.prob_model import ProbModel
 
@@ -20,15 +24,34 @@ logger = logging.getLogger(__name__)
 # Type aliases
 BacktestMetrics = Dict[str, float]
 
-# Feature selection pattern
-FEATURE_PATTERN = re.compile(r'(mean|std|min|max|count|unc|decay)')
+# Feature column prefixes (same columns as models.prob_model.FEATURE_PATTERN)
+FEATURE_PREFIXES = ('mean', 'std', 'min', 'max', 'count', 'unc', 'decay')
+
+# Plot and report are written in the background so run() returns as soon as metrics are ready.
+# Writes still in flight are tracked until they finish and waited for at interpreter exit.
+_IO_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backtest-io')
+_PENDING_OUTPUTS: Set[Future] = set()
+_PENDING_LOCK = threading.Lock()
+
+# The equity plot never needs more points than this
+MAX_PLOT_POINTS = 2000
+
+# Equity figure, created on first use and redrawn by the (single) I/O thread
+_EQUITY_FIG: Optional[Figure] = None
+
+# Loaded models keyed by path, reused while the file's mtime is unchanged
+_MODEL_CACHE: Dict[str, Tuple[float, ProbModel]] = {}
+
+# Rows per predict_proba call, so each slab of X stays cache-resident
+PREDICT_CHUNK_ROWS = 65536
 
 
 def run(
     df: pd.DataFrame,
     model_path: str,
     threshold_long: float,
-    costs_bps: int
+    costs_bps: int,
+    save_plot: bool = True
 ) -> BacktestMetrics:
     """
     Run event-driven backtest on sentiment data.
@@ -42,11 +65,12 @@ def run(
     
     Args:
         df: DataFrame with features and labels.
-            Must have columns matching FEATURE_PATTERN, 'r_fwd', 'y', 
+            Must have columns starting with FEATURE_PREFIXES, 'r_fwd', 'y', 
             'ticker', 'bucket_start'.
         model_path: Path to trained ProbModel pickle file.
         threshold_long: Probability threshold for entering long positions.
         costs_bps: Transaction costs in basis points.
+        save_plot: Render outputs/equity.png (skip for automated sweeps).
         
     Returns:
         Dictionary with metrics:
@@ -67,39 +91,170 @@ def run(
         ... )
         >>> print(f"Sharpe: {metrics['sharpe']:.2f}")
     """
-    # Load model
-    logger.info(f"Loading model from {model_path}")
-    model = ProbModel.load(model_path)
+    df, P = _predict(df, model_path)
+
+    # Simulate the strategy and compute the equity curve
+    log_equity = _simulate(df, threshold_long, costs_bps)
+
+    # Calculate all metrics
+    metrics = _compute_metrics(df, P, log_equity)
+
+    # Save outputs in the background (see wait_for_outputs)
+    if save_plot:
+        _submit_output(_save_equity_plot, _downsample_equity(df))
+    _submit_output(_save_report, metrics)
+
+    logger.info(f"Backtest complete. Sharpe: {metrics['sharpe']:.4f}, AUC: {metrics['auc']:.4f}")
+    
+    return metrics
+
+
+def run_batch(
+    df: pd.DataFrame,
+    model_path: str,
+    thresholds: Iterable[float],
+    costs_bps: Iterable[int]
+) -> pd.DataFrame:
+    """
+    Sweep the strategy over thresholds and costs with a single prediction pass.
+    
+    The threshold and costs only change the PnL mask, so probabilities and the
+    classification metrics (AUC, Brier) are computed once and shared by every
+    combination. No plot or report is written.
+    
+    Args:
+        df: DataFrame with features and labels (same requirements as run()).
+        model_path: Path to trained ProbModel pickle file.
+        thresholds: Probability thresholds for entering long positions.
+        costs_bps: Transaction costs in basis points.
+        
+    Returns:
+        DataFrame with one row per (threshold_long, costs_bps) and the
+        metrics returned by run() as columns.
+        
+    Example:
+        >>> sweep = run_batch(training_df, 'outputs/prob_model.pkl',
+        ...                   thresholds=[0.55, 0.6, 0.65], costs_bps=[5, 10])
+        >>> best = sweep.sort_values('sharpe').iloc[-1]
+    """
+    df, P = _predict(df, model_path)
+    y_true = df['y'].to_numpy()
+    classification = (_compute_auc(y_true, P), float(np.mean((P - y_true) ** 2)))
+
+    rows = []
+    for threshold_long in thresholds:
+        for costs in costs_bps:
+            log_equity = _simulate(df, threshold_long, costs)
+            metrics = _compute_metrics(df, P, log_equity, classification)
+            rows.append({'threshold_long': threshold_long, 'costs_bps': costs, **metrics})
+
+    logger.info(f"Backtest sweep complete: {len(rows)} combinations")
+    return pd.DataFrame(rows)
+
+
+def _predict(df: pd.DataFrame, model_path: str) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Predict probabilities and return the bars sorted by ticker and time.
+    
+    Args:
+        df: DataFrame with features and labels.
+        model_path: Path to trained ProbModel pickle file.
+        
+    Returns:
+        Tuple of (sorted DataFrame with a 'P' column, probability array).
+    """
+    # Load model (cached across runs on the same file)
+    model = _load_model(model_path)
 
     # Select features
-    feature_cols = [col for col in df.columns if FEATURE_PATTERN.match(col)]
-    X = df[feature_cols]
+    feature_cols = _feature_columns(tuple(df.columns))
+    # float32 halves the memory traffic into the predictor
+    X = df[feature_cols].astype(np.float32)
     
     logger.info(f"Running backtest with {len(df)} samples and {len(feature_cols)} features")
 
     # Predict probabilities
-    P = model.predict_proba(X)
+    P = _predict_proba_chunked(model, X)
 
     # Sort by ticker and time
-    df = df.sort_values(['ticker', 'bucket_start']).copy()
+    df = df.sort_values(['ticker', 'bucket_start'])
     df['P'] = P
+    return df, P
 
-    # Compute PnL
-    df = _compute_pnl(df, threshold_long, costs_bps)
 
-    # Compute equity curve
-    df['equity'] = (1 + df['pnl']).cumprod()
+def _simulate(df: pd.DataFrame, threshold_long: float, costs_bps: int) -> np.ndarray:
+    """
+    Add 'pnl' and 'equity' columns for one threshold/cost setting.
+    
+    Args:
+        df: Sorted DataFrame with 'P' and 'r_fwd'. Modified in place.
+        threshold_long: Threshold for long entry.
+        costs_bps: Transaction costs in basis points.
+        
+    Returns:
+        Log of the equity curve.
+    """
+    _compute_pnl(df, threshold_long, costs_bps)
 
-    # Calculate all metrics
-    metrics = _compute_metrics(df, P)
+    # Equity curve in log space (stable for long series), exponentiated once; a bar losing
+    # everything (net of costs) floors equity just above zero instead of taking log(0)
+    log_equity = np.log1p(np.maximum(df['pnl'].to_numpy(), -1 + 1e-12)).cumsum()
+    df['equity'] = np.exp(log_equity)
+    return log_equity
 
-    # Save outputs
-    _save_equity_plot(df)
-    _save_report(metrics)
 
-    logger.info(f"Backtest complete. Sharpe: {metrics['sharpe']:.4f}, AUC: {metrics['auc']:.4f}")
-    
-    return metrics
+def _submit_output(fn, *args) -> Future:
+    """Queue a plot/report write on the I/O thread, tracked until it completes."""
+    future = _IO_POOL.submit(fn, *args)
+    with _PENDING_LOCK:
+        _PENDING_OUTPUTS.add(future)
+    future.add_done_callback(_forget_output)
+    return future
+
+
+def _forget_output(future: Future) -> None:
+    """Drop a finished write from the pending set."""
+    with _PENDING_LOCK:
+        _PENDING_OUTPUTS.discard(future)
+
+
+@atexit.register
+def wait_for_outputs() -> None:
+    """Block until the equity plot and report of previous runs are written."""
+    with _PENDING_LOCK:
+        pending = list(_PENDING_OUTPUTS)
+    wait(pending)
+
+
+def _load_model(model_path: str) -> ProbModel:
+    """Load a ProbModel, reusing the unpickled instance until the file changes."""
+    mtime = os.path.getmtime(model_path)
+    cached = _MODEL_CACHE.get(model_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    logger.info(f"Loading model from {model_path}")
+    model = ProbModel.load(model_path)
+    _MODEL_CACHE[model_path] = (mtime, model)
+    return model
+
+
+def _predict_proba_chunked(model: ProbModel, X: pd.DataFrame,
+                           chunk_rows: int = PREDICT_CHUNK_ROWS) -> np.ndarray:
+    """Predict probabilities slab by slab into a preallocated array."""
+    if len(X) <= chunk_rows:
+        return model.predict_proba(X)
+
+    P = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), chunk_rows):
+        P[start:start + chunk_rows] = model.predict_proba(X.iloc[start:start + chunk_rows])
+    return P
+
+
+@lru_cache(maxsize=32)
+def _feature_columns(columns: Tuple[str, ...]) -> List[str]:
+    """Feature columns for a given column layout, cached across runs."""
+    return [col for col in columns if col.startswith(FEATURE_PREFIXES)]
 
 
 def _compute_pnl(
@@ -112,55 +267,60 @@ def _compute_pnl(
     
     Args:
         df: DataFrame with probability predictions and forward returns.
+            Modified in place; the caller owns it.
         threshold_long: Threshold for long entry.
         costs_bps: Transaction costs in basis points.
         
     Returns:
         DataFrame with 'pnl' column added.
     """
-    df = df.copy()
-    df['pnl'] = 0.0
-    
     # Long when probability exceeds threshold
-    mask = df['P'] > threshold_long
     costs = costs_bps * 1e-4
-    df.loc[mask, 'pnl'] = df.loc[mask, 'r_fwd'] - costs
+    df['pnl'] = np.where(df['P'].to_numpy() > threshold_long, df['r_fwd'].to_numpy() - costs, 0.0)
     
     return df
 
 
-def _compute_metrics(df: pd.DataFrame, P: np.ndarray) -> BacktestMetrics:
+def _compute_metrics(
+    df: pd.DataFrame,
+    P: np.ndarray,
+    log_equity: np.ndarray,
+    classification: Optional[Tuple[float, float]] = None
+) -> BacktestMetrics:
     """
     Compute comprehensive backtest metrics.
     
     Args:
         df: DataFrame with PnL and equity.
         P: Probability predictions.
+        log_equity: Cumulative log returns (log of the equity curve).
+        classification: Precomputed (auc, brier), reused across a sweep.
         
     Returns:
         Dictionary of performance metrics.
     """
-    y_true = df['y'].values
-    pnl_series = df['pnl']
+    pnl = df['pnl'].to_numpy()
     
     # Classification metrics
-    auc = roc_auc_score(y_true, P)
-    brier = brier_score_loss(y_true, P)
+    if classification is None:
+        y_true = df['y'].to_numpy()
+        classification = (_compute_auc(y_true, P), np.mean((P - y_true) ** 2))
+    auc, brier = classification
     
-    # Trading metrics
-    win_rate = (pnl_series > 0).mean()
-    positive_pnl = pnl_series[pnl_series > 0].sum()
-    negative_pnl = pnl_series[pnl_series < 0].sum()
+    # Trading metrics, reduced directly over the pnl array (clipped sums, no boolean gathers)
+    win_rate = np.count_nonzero(pnl > 0) / len(pnl)
+    positive_pnl = pnl.clip(min=0).sum()
+    negative_pnl = pnl.clip(max=0).sum()
     profit_factor = abs(positive_pnl / negative_pnl) if negative_pnl != 0 else np.inf
     
     # Total return
-    total_return = df['equity'].iloc[-1] - 1
+    total_return = np.expm1(log_equity[-1])
 
     # Sharpe ratio (daily resample, annualized)
     sharpe = _compute_sharpe(df)
 
     # Maximum drawdown
-    max_dd = _compute_max_drawdown(df)
+    max_dd = _compute_max_drawdown(log_equity)
 
     return {
         'total_return': float(total_return),
@@ -173,6 +333,27 @@ def _compute_metrics(df: pd.DataFrame, P: np.ndarray) -> BacktestMetrics:
     }
 
 
+def _compute_auc(y_true: np.ndarray, P: np.ndarray) -> float:
+    """
+    Compute ROC AUC from ranks (Mann-Whitney U), without a threshold sweep.
+    
+    Args:
+        y_true: Binary labels (0 or 1).
+        P: Probability predictions.
+        
+    Returns:
+        ROC AUC score; tied predictions get half credit via average ranks.
+    """
+    positive = y_true == 1
+    n_pos = int(np.count_nonzero(positive))
+    n_neg = len(y_true) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+
+    ranks = rankdata(P)
+    return float((ranks[positive].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
 def _compute_sharpe(df: pd.DataFrame, annualization_factor: int = 252) -> float:
     """
     Compute annualized Sharpe ratio from equity curve.
@@ -185,14 +366,24 @@ def _compute_sharpe(df: pd.DataFrame, annualization_factor: int = 252) -> float:
         Annualized Sharpe ratio.
     """
     try:
-        daily_equity = df.set_index('bucket_start')['equity'].resample('D').last().dropna()
-        daily_returns = daily_equity.pct_change().dropna()
+        bucket_start = df['bucket_start']
+        if bucket_start.dt.tz is not None:
+            # Calendar days in the bars' own timezone, as resample('D') would bin them
+            bucket_start = bucket_start.dt.tz_localize(None)
+        timestamps = bucket_start.to_numpy()
+
+        # Last equity of each day present: stable time sort, then the end of each day's run
+        order = np.argsort(timestamps, kind='stable')
+        days = timestamps[order].astype('datetime64[D]')
+        day_ends = np.append(np.flatnonzero(days[1:] != days[:-1]), len(days) - 1)
+        daily_equity = df['equity'].to_numpy()[order][day_ends]
+        daily_returns = daily_equity[1:] / daily_equity[:-1] - 1
         
         if len(daily_returns) < 2:
             return 0.0
             
         mean_return = daily_returns.mean()
-        std_return = daily_returns.std()
+        std_return = daily_returns.std(ddof=1)
         
         if std_return == 0:
             return 0.0
@@ -204,41 +395,64 @@ def _compute_sharpe(df: pd.DataFrame, annualization_factor: int = 252) -> float:
         return 0.0
 
 
-def _compute_max_drawdown(df: pd.DataFrame) -> float:
+def _compute_max_drawdown(log_equity: np.ndarray) -> float:
     """
     Compute maximum drawdown from equity curve.
     
     Args:
-        df: DataFrame with 'equity' column.
+        log_equity: Log of the equity curve.
         
     Returns:
         Maximum drawdown as a negative percentage.
     """
-    peak = df['equity'].expanding().max()
-    drawdown = (df['equity'] - peak) / peak
-    return float(drawdown.min())
+    log_peak = np.maximum.accumulate(log_equity)
+    return float(np.expm1(log_equity - log_peak).min())
+
+
+def _downsample_equity(df: pd.DataFrame, max_points: int = MAX_PLOT_POINTS) -> pd.DataFrame:
+    """
+    Take an evenly strided subset of the equity curve for plotting.
+    
+    Args:
+        df: DataFrame with 'bucket_start' and 'equity' columns.
+        max_points: Maximum number of points to keep (the last bar is always kept).
+        
+    Returns:
+        New DataFrame with only 'bucket_start' and 'equity'.
+    """
+    step = max(1, -(-len(df) // max_points))
+    idx = np.arange(len(df) - 1, -1, -step)[::-1]
+    return df[['bucket_start', 'equity']].iloc[idx].reset_index(drop=True)
 
 
 def _save_equity_plot(df: pd.DataFrame, output_path: str = 'outputs/equity.png') -> None:
     """
     Save equity curve plot to file.
     
+    Uses the object-oriented Figure API (no pyplot global state), so it is
+    safe to call from the background I/O thread. The figure is built once and
+    cleared between runs.
+    
     Args:
         df: DataFrame with 'bucket_start' and 'equity' columns.
         output_path: Path to save the plot.
     """
+    global _EQUITY_FIG
     try:
-        plt.figure(figsize=(12, 6))
-        plt.plot(df['bucket_start'], df['equity'], linewidth=2, color='#2E86AB')
-        plt.fill_between(df['bucket_start'], 1, df['equity'], alpha=0.3, color='#2E86AB')
-        plt.axhline(y=1, color='gray', linestyle='--', alpha=0.7)
-        plt.title('Equity Curve - Sentiment Strategy', fontsize=14, fontweight='bold')
-        plt.xlabel('Time')
-        plt.ylabel('Equity (starting at 1.0)')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150)
-        plt.close()
+        if _EQUITY_FIG is None:
+            _EQUITY_FIG = Figure(figsize=(12, 6))
+        fig = _EQUITY_FIG
+        fig.clear()
+        ax = fig.subplots()
+        ax.plot(df['bucket_start'], df['equity'], linewidth=2, color='#2E86AB')
+        ax.fill_between(df['bucket_start'], 1, df['equity'], alpha=0.3, color='#2E86AB')
+        ax.axhline(y=1, color='gray', linestyle='--', alpha=0.7)
+        ax.set_title('Equity Curve - Sentiment Strategy', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Time')
+        ax.set_ylabel('Equity (starting at 1.0)')
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(output_path, dpi=150)
         logger.info(f"Saved equity plot to {output_path}")
     except Exception as e:
         logger.error(f"Error saving equity plot: {e}")
@@ -9,9 +9,17 @@ from typing import Dict, Any, List, Optional
 import pandas as pd
 import numpy as np
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
+TRAINING_SET_PARQUET = 'data/training_set.parquet'
+
+# Downloaded prices are cached per (symbol, interval, period) and refreshed after the TTL
+PRICE_CACHE_DIR = 'data/price_cache'
+PRICE_CACHE_TTL_SECONDS = 12 * 3600
+
 
 def make_labels(
     sent_bars_csv: str,
@@ -22,13 +30,13 @@ def make_labels(
     Create labeled training data by merging sentiment bars with price data.
     
     This function:
-    1. Loads sentiment bars from CSV
+    1. Loads sentiment bars from CSV or Parquet
     2. Downloads/loads price data for configured symbols
     3. Merges sentiment with prices on (ticker, bucket_start)
     4. Computes forward returns and binary labels
     
     Args:
-        sent_bars_csv: Path to sentiment bars CSV file.
+        sent_bars_csv: Path to sentiment bars file (.csv or .parquet).
         horizon_bars: Number of buckets ahead for forward return calculation.
         price_cfg: Price configuration dict with keys:
             - symbols: List of ticker symbols
@@ -52,7 +60,7 @@ def make_labels(
     """
     # Read sentiment bars
     logger.info(f"Loading sentiment bars from {sent_bars_csv}")
-    sent_df = pd.read_csv(sent_bars_csv)
+    sent_df = _read_frame(sent_bars_csv)
     sent_df['bucket_start'] = pd.to_datetime(sent_df['bucket_start'], utc=True)
 
     # Load price data
@@ -65,6 +73,9 @@ def make_labels(
     # Resample to weekly, taking last close of the week
     prices_weekly = _resample_prices_weekly(prices_df)
 
+    # Only tickers with sentiment can survive the inner join; drop the rest before hashing
+    prices_weekly = prices_weekly[prices_weekly['ticker'].isin(sent_df['ticker'].unique())]
+
     # Merge sentiment with prices
     merged = pd.merge(
         sent_df,
@@ -83,13 +94,19 @@ def make_labels(
     merged = _compute_labels(merged, horizon_bars)
 
     # Save to file
-    output_path = 'data/training_set.csv'
-    merged.to_csv(output_path, index=False)
-    logger.info(f"Saved training set to {output_path}")
+    merged.to_parquet(TRAINING_SET_PARQUET, compression='zstd', index=False)
+    logger.info(f"Saved training set to {TRAINING_SET_PARQUET}")
     
     return merged
 
 
+def _read_frame(path: str) -> pd.DataFrame:
+    """Read a Parquet file, or a CSV with the multi-threaded Arrow parser."""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, engine='pyarrow')
+
+
 def _load_price_data(price_cfg: Dict[str, Any]) -> pd.DataFrame:
     """
     Load price data from yfinance or fallback to demo data.
@@ -108,16 +125,31 @@ def _load_price_data(price_cfg: Dict[str, Any]) -> pd.DataFrame:
     
     try:
         import yfinance as yf
-        
-        for sym in symbols:
-            # Skip non-tradeable indices
-            if sym in ['IPCA', 'PIB', 'SELIC']:
+
+        # Skip non-tradeable indices
+        tradeable = [sym for sym in symbols if sym not in ['IPCA', 'PIB', 'SELIC']]
+
+        # Serve fresh symbols from the local cache, download only the rest
+        cached = {sym: _read_price_cache(sym, interval, period) for sym in tradeable}
+        missing = [sym for sym in tradeable if cached[sym] is None]
+
+        # One multi-ticker request; yfinance fetches the symbols concurrently
+        raw = None
+        if missing:
+            logger.info(f"Downloading price data for {', '.join(missing)}")
+            raw = yf.download(
+                missing, interval=interval, period=period,
+                group_by='ticker', threads=True, progress=False
+            )
+
+        for sym in tradeable:
+            if cached[sym] is not None:
+                prices_df_list.append(cached[sym])
                 continue
-                
-            logger.info(f"Downloading price data for {sym}")
-            data = yf.download(sym, interval=interval, period=period, progress=False)
+
+            data = _symbol_frame(raw, sym)
             
-            if not isinstance(data, pd.DataFrame) or data.empty:
+            if data is None or data.empty:
                 logger.warning(f"No data downloaded for {sym}")
                 continue
                 
@@ -133,18 +165,18 @@ def _load_price_data(price_cfg: Dict[str, Any]) -> pd.DataFrame:
                 logger.warning(f"Could not find date column for {sym}")
                 continue
                 
-            data[date_col] = pd.to_datetime(data[date_col])
             data['ticker'] = sym
             data.rename(columns={'Close': 'close', date_col: 'timestamp'}, inplace=True)
             
-            # Make timezone aware (UTC)
-            if data['timestamp'].dt.tz is None:
-                data['timestamp'] = data['timestamp'].dt.tz_localize('UTC')
-            else:
-                data['timestamp'] = data['timestamp'].dt.tz_convert('UTC')
+            # Parse as UTC in one step (localizes naive, converts aware timestamps)
+            data['timestamp'] = pd.to_datetime(data['timestamp'], utc=True)
                 
-            prices_df_list.append(data[['ticker', 'timestamp', 'close']])
+            data = data[['ticker', 'timestamp', 'close']]
+            _write_price_cache(data, sym, interval, period)
+            prices_df_list.append(data)
             
+        if len(prices_df_list) == 1:
+            return prices_df_list[0].reset_index(drop=True)
         if prices_df_list:
             return pd.concat(prices_df_list, ignore_index=True)
             
@@ -157,6 +189,45 @@ def _load_price_data(price_cfg: Dict[str, Any]) -> pd.DataFrame:
     return _load_demo_prices()
 
 
+def _price_cache_path(sym: str, interval: str, period: str) -> str:
+    """Cache file for one symbol's download."""
+    return os.path.join(PRICE_CACHE_DIR, f"{sym.replace(os.sep, '_')}_{interval}_{period}.parquet")
+
+
+def _read_price_cache(sym: str, interval: str, period: str) -> Optional[pd.DataFrame]:
+    """Cached prices for a symbol, or None if missing, stale or unreadable."""
+    path = _price_cache_path(sym, interval, period)
+    try:
+        if time.time() - os.path.getmtime(path) > PRICE_CACHE_TTL_SECONDS:
+            return None
+        logger.info(f"Loading cached price data for {sym}")
+        return pd.read_parquet(path)
+    except Exception:
+        return None
+
+
+def _write_price_cache(data: pd.DataFrame, sym: str, interval: str, period: str) -> None:
+    """Best-effort write of a symbol's prices to the cache."""
+    try:
+        os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+        data.to_parquet(_price_cache_path(sym, interval, period), compression='zstd', index=False)
+    except Exception as e:
+        logger.warning(f"Could not cache prices for {sym}: {e}")
+
+
+def _symbol_frame(raw: Optional[pd.DataFrame], sym: str) -> Optional[pd.DataFrame]:
+    """Extract one symbol's OHLC frame from a (possibly multi-ticker) yf.download result."""
+    if not isinstance(raw, pd.DataFrame) or raw.empty:
+        return None
+    if isinstance(raw.columns, pd.MultiIndex):
+        if sym not in raw.columns.get_level_values(0):
+            return None
+        # Multi-ticker frames share the union of all dates; drop the symbol's empty rows
+        return raw[sym].dropna(how='all')
+    # Flat columns: single-symbol download
+    return raw
+
+
 def _find_date_column(columns: pd.Index) -> Optional[str]:
     """Find the date column name in a DataFrame."""
     for col in ['Datetime', 'Date']:
@@ -187,18 +258,53 @@ def _resample_prices_weekly(prices_df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with ticker, bucket_start, close.
     """
-    prices_weekly = (
-        prices_df
-        .set_index('timestamp')
-        .groupby('ticker')
-        .resample('W-MON', label='left', closed='left')['close']
-        .last()
-        .reset_index()
-    )
+    tickers = prices_df['ticker'].unique()
+    if len(tickers) == 1:
+        # Single symbol (the common case): plain resample, no per-ticker groupby
+        prices_weekly = (
+            prices_df
+            .set_index('timestamp')['close']
+            .resample('W-MON', label='left', closed='left')
+            .last()
+            .reset_index()
+        )
+        prices_weekly.insert(0, 'ticker', tickers[0])
+    else:
+        prices_weekly = _weekly_last_by_ticker(prices_df)
     prices_weekly = prices_weekly.rename(columns={'timestamp': 'bucket_start'})
     return prices_weekly
 
 
+def _weekly_last_by_ticker(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Last close per (ticker, week starting Monday), like a per-ticker resample.
+    
+    Floors each timestamp to its Monday and aggregates with one flat groupby,
+    then fills the empty weeks between each ticker's first and last bar with
+    NaN, as resample does.
+    """
+    # groupby().last() takes the last row in frame order; resample takes the latest timestamp
+    if not prices_df['timestamp'].is_monotonic_increasing:
+        prices_df = prices_df.sort_values('timestamp', kind='stable')
+    ts = prices_df['timestamp']
+    week = ts.dt.normalize() - pd.to_timedelta(ts.dt.dayofweek, unit='D')
+    last = prices_df.groupby([prices_df['ticker'], week.rename('timestamp')])['close'].last()
+
+    # Complete weekly grid per ticker: first week + 0..n-1 weeks
+    weeks = last.index.get_level_values('timestamp')
+    bounds = pd.Series(weeks).groupby(last.index.get_level_values('ticker').to_numpy()).agg(['min', 'max'])
+    n_weeks = ((bounds['max'] - bounds['min']) // pd.Timedelta(weeks=1)).to_numpy() + 1
+    offsets = np.arange(n_weeks.sum()) - np.repeat(np.cumsum(n_weeks) - n_weeks, n_weeks)
+    grid = pd.MultiIndex.from_arrays(
+        [
+            np.repeat(bounds.index.to_numpy(), n_weeks),
+            pd.DatetimeIndex(np.repeat(bounds['min'].to_numpy(), n_weeks)) + pd.to_timedelta(offsets, unit='W')
+        ],
+        names=['ticker', 'timestamp']
+    )
+    return last.reindex(grid).reset_index()
+
+
 def _compute_labels(df: pd.DataFrame, horizon_bars: int) -> pd.DataFrame:
     """
     Compute forward returns and binary labels.
@@ -210,10 +316,24 @@ def _compute_labels(df: pd.DataFrame, horizon_bars: int) -> pd.DataFrame:
     Returns:
         DataFrame with r_fwd and y columns added.
     """
-    df = df.sort_values(['ticker', 'bucket_start']).copy()
-    df['close_fwd'] = df.groupby('ticker')['close'].shift(-horizon_bars)
-    df['r_fwd'] = (df['close_fwd'] / df['close']) - 1
-    df['y'] = (df['r_fwd'] > 0).astype(int)
+    # sort_values already returns a new frame, so no defensive copy is needed
+    df = df.sort_values(['ticker', 'bucket_start'])
+    close = df['close'].to_numpy(dtype=float)
+
+    if horizon_bars > 0:
+        # Rows are grouped by ticker, so the forward close is a plain array shift,
+        # masked where it would cross into the next ticker
+        tickers = df['ticker'].to_numpy()
+        close_fwd = np.full(len(df), np.nan)
+        close_fwd[:-horizon_bars] = close[horizon_bars:]
+        close_fwd[:-horizon_bars][tickers[:-horizon_bars] != tickers[horizon_bars:]] = np.nan
+    else:
+        close_fwd = df.groupby('ticker')['close'].shift(-horizon_bars).to_numpy(dtype=float)
+
+    r_fwd = close_fwd / close - 1
+    df['close_fwd'] = close_fwd
+    df['r_fwd'] = r_fwd
+    df['y'] = (r_fwd > 0).astype(np.int8)
 
     # Drop rows with NaN r_fwd (last horizon_bars rows per ticker)
     before_count = len(df)
@@ -7,20 +7,46 @@ past data and tested on future data.
 """
 
 from typing import Dict, List, Any, Optional, Tuple
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from sklearn.metrics import roc_auc_score, brier_score_loss, accuracy_score
+from joblib import Parallel, delayed
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from datetime import datetime
-import re
 import logging
 
 from models.prob_model import ProbModel
 
 logger = logging.getLogger(__name__)
 
-# Feature pattern
-FEATURE_PATTERN = re.compile(r'(mean|std|min|max|count|unc|decay)')
+# Feature column prefixes (same columns as models.prob_model.FEATURE_PATTERN)
+FEATURE_PREFIXES = ('mean', 'std', 'min', 'max', 'count', 'unc', 'decay')
+
+
+@lru_cache(maxsize=32)
+def _feature_columns(columns: Tuple[str, ...]) -> List[str]:
+    """Feature columns for a given column layout, cached across runs."""
+    return [col for col in columns if col.startswith(FEATURE_PREFIXES)]
+
+
+def _fit_predict_fold(
+    template: ProbModel,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray
+) -> np.ndarray:
+    """Train a fresh clone of the template on one fold and return its test probabilities."""
+    model = template.clone()
+    model.fit(X_train, y_train)
+    return model.predict_proba(X_test)
+
+
+def _has_both_classes(y_true: np.ndarray) -> bool:
+    """Whether 0/1 labels contain both classes (a count, no sort like np.unique)."""
+    positives = np.count_nonzero(y_true)
+    return 0 < positives < y_true.size
 
 
 class WalkForwardBacktester:
@@ -41,7 +67,9 @@ class WalkForwardBacktester:
         train_size: float = 0.6,
         step_size: float = 0.1,
         expanding: bool = True,
-        min_train_samples: int = 30
+        min_train_samples: int = 30,
+        n_jobs: int = 1,
+        refit_min_rows: int = 0
     ):
         """
         Initialize the walk-forward backtester.
@@ -51,13 +79,21 @@ class WalkForwardBacktester:
             step_size: Step size for each walk-forward iteration.
             expanding: If True, uses expanding window. If False, rolling.
             min_train_samples: Minimum samples required for training.
+            n_jobs: Folds trained in parallel (joblib convention: 1 = sequential,
+                -1 = all cores).
+            refit_min_rows: Refit only once the training window has moved by at
+                least this many rows; earlier folds reuse the last model
+                (0 = refit every fold).
         """
         self.train_size = train_size
         self.step_size = step_size
         self.expanding = expanding
         self.min_train_samples = min_train_samples
+        self.n_jobs = n_jobs
+        self.refit_min_rows = refit_min_rows
         
         self.results: List[Dict[str, Any]] = []
+        self.results_df: pd.DataFrame = pd.DataFrame()
         self.all_predictions: pd.DataFrame = pd.DataFrame()
     
     def run(
@@ -65,7 +101,8 @@ class WalkForwardBacktester:
         df: pd.DataFrame,
         threshold_long: float = 0.62,
         threshold_short: float = 0.38,
-        costs_bps: int = 10
+        costs_bps: int = 10,
+        presorted: bool = False
     ) -> Dict[str, Any]:
         """
         Run walk-forward backtest.
@@ -75,15 +112,18 @@ class WalkForwardBacktester:
             threshold_long: Probability threshold for long positions.
             threshold_short: Probability threshold for short positions.
             costs_bps: Transaction costs in basis points.
+            presorted: Caller guarantees df is already sorted by 'bucket_start'.
             
         Returns:
             Dictionary with backtest results and metrics.
         """
-        # Sort by time
-        df = df.sort_values('bucket_start').reset_index(drop=True)
+        # Sort by time (skipped when the input is already in order, e.g. across a sweep)
+        if not presorted and not df['bucket_start'].is_monotonic_increasing:
+            df = df.sort_values('bucket_start')
+        df = df.reset_index(drop=True)
         
         # Get feature columns
-        feature_cols = [col for col in df.columns if FEATURE_PATTERN.match(col)]
+        feature_cols = _feature_columns(tuple(df.columns))
         
         n = len(df)
         initial_train_end = int(n * self.train_size)
@@ -94,63 +134,92 @@ class WalkForwardBacktester:
             return {'error': 'Insufficient data'}
         
         self.results = []
-        all_test_indices = []
-        all_predictions = []
         
-        # Walk-forward iterations
-        train_start = 0
+        # Fold boundaries are known up front, so the folds can train independently
+        window_size = int(n * self.train_size)
+        fold_ranges = []
         train_end = initial_train_end
-        iteration = 0
-        
         while train_end < n - 1:
             test_end = min(train_end + step, n)
             
             if test_end <= train_end:
                 break
             
-            # Train/test split
-            if self.expanding:
-                train_df = df.iloc[train_start:train_end]
+            # Expanding window starts at 0; rolling keeps the last window_size rows
+            train_start = 0 if self.expanding else max(0, train_end - window_size)
+            fold_ranges.append((train_start, train_end, test_end))
+            train_end = test_end
+        
+        for iteration, (train_start, train_end, test_end) in enumerate(fold_ranges):
+            logger.info(f"Iteration {iteration}: Train [{train_start}:{train_end}], Test [{train_end}:{test_end}]")
+        
+        # Extract contiguous arrays once; per-fold slices are views, not new frames
+        X_all = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32))
+        y_all = df['y'].to_numpy(dtype=np.int8)
+        r_all = df['r_fwd'].to_numpy(dtype=float) if 'r_fwd' in df else np.zeros(n)
+        
+        # Consecutive folds share one model until the window has moved by refit_min_rows.
+        # Test ranges are contiguous, so each model predicts its folds in one call.
+        fits = []  # (train_start, train_end, test_end of the last fold using the model)
+        fold_fit = []
+        for train_start, train_end, test_end in fold_ranges:
+            if fits and train_end - fits[-1][1] < self.refit_min_rows:
+                fits[-1] = (fits[-1][0], fits[-1][1], test_end)
             else:
-                # Rolling window
-                window_size = int(n * self.train_size)
-                train_df = df.iloc[max(0, train_end - window_size):train_end]
-            
-            test_df = df.iloc[train_end:test_end]
-            
-            logger.info(f"Iteration {iteration}: Train [{train_start if self.expanding else max(0, train_end - int(n * self.train_size))}:{train_end}], Test [{train_end}:{test_end}]")
-            
-            # Train model
-            X_train = train_df[feature_cols]
-            y_train = train_df['y']
-            
-            model = ProbModel()
-            model.fit(X_train, y_train)
-            
-            # Predict on test
-            X_test = test_df[feature_cols]
-            y_test = test_df['y']
-            
-            probabilities = model.predict_proba(X_test)
-            
+                fits.append((train_start, train_end, test_end))
+            fold_fit.append(len(fits) - 1)
+        
+        # Train and predict every model in parallel (joblib memmaps large arrays for the workers)
+        template = ProbModel()
+        fit_probabilities = Parallel(n_jobs=self.n_jobs, backend='loky')(
+            delayed(_fit_predict_fold)(
+                template,
+                X_all[train_start:train_end],
+                y_all[train_start:train_end],
+                X_all[train_end:test_end]
+            )
+            for train_start, train_end, test_end in fits
+        )
+        
+        # Split each model's predictions back into its folds
+        test_start = fold_ranges[0][1] if fold_ranges else 0
+        probabilities_all = np.concatenate(fit_probabilities) if fit_probabilities else np.array([])
+        fold_probabilities = [
+            probabilities_all[train_end - test_start:test_end - test_start]
+            for _, train_end, test_end in fold_ranges
+        ]
+        
+        # Test rows and their predictions, written fold by fold into preallocated arrays
+        all_test_indices = np.empty(n, dtype=np.int64)
+        all_predictions = np.empty(n, dtype=np.float64)
+        write = 0
+        
+        for iteration, ((train_start, train_end, test_end), probabilities) in enumerate(
+            zip(fold_ranges, fold_probabilities)
+        ):
             # Calculate metrics for this fold
             fold_metrics = self._calculate_fold_metrics(
-                y_test.values, probabilities, threshold_long, threshold_short, costs_bps,
-                test_df.get('r_fwd', pd.Series([0] * len(test_df)))
+                y_all[train_end:test_end], probabilities, threshold_long, threshold_short, costs_bps,
+                r_all[train_end:test_end]
             )
             fold_metrics['iteration'] = iteration
-            fold_metrics['train_size'] = len(train_df)
-            fold_metrics['test_size'] = len(test_df)
+            fit_start, fit_end, _ = fits[fold_fit[iteration]]
+            fold_metrics['train_size'] = fit_end - fit_start
+            fold_metrics['test_size'] = test_end - train_end
             
             self.results.append(fold_metrics)
             
             # Store predictions
-            all_test_indices.extend(test_df.index.tolist())
-            all_predictions.extend(probabilities.tolist())
-            
-            # Move window
-            train_end = test_end
-            iteration += 1
+            k = test_end - train_end
+            all_test_indices[write:write + k] = np.arange(train_end, test_end)
+            all_predictions[write:write + k] = probabilities
+            write += k
+        
+        all_test_indices = all_test_indices[:write]
+        all_predictions = all_predictions[:write]
+        
+        # Columnar view of the fold metrics for the summary and plots
+        self.results_df = pd.DataFrame(self.results)
         
         # Combine all predictions
         self.all_predictions = pd.DataFrame({
@@ -159,7 +228,7 @@ class WalkForwardBacktester:
         })
         
         # Calculate aggregate metrics
-        summary = self._calculate_summary_metrics(df, feature_cols, all_test_indices, all_predictions)
+        summary = self._calculate_summary_metrics(y_all[all_test_indices], all_predictions)
         
         return {
             'summary': summary,
@@ -175,13 +244,13 @@ class WalkForwardBacktester:
         threshold_long: float,
         threshold_short: float,
         costs_bps: int,
-        r_fwd: pd.Series
+        r_fwd: np.ndarray
     ) -> Dict[str, float]:
         """Calculate metrics for a single fold."""
         metrics = {}
         
         # Classification metrics
-        if len(np.unique(y_true)) > 1:
+        if _has_both_classes(y_true):
             metrics['auc'] = roc_auc_score(y_true, y_prob)
         else:
             metrics['auc'] = 0.5
@@ -193,13 +262,16 @@ class WalkForwardBacktester:
         metrics['accuracy'] = accuracy_score(y_true, y_pred)
         
         # Trading metrics
+        # Only traded bars move equity, so work on that subset (no full-length PnL temporaries)
         costs = costs_bps * 1e-4
-        pnl = np.where(y_prob > threshold_long, r_fwd.values - costs, 0)
-        
-        if len(pnl) > 0:
-            metrics['total_return'] = (1 + pnl).prod() - 1
-            metrics['win_rate'] = (pnl > 0).mean()
-            metrics['n_trades'] = (y_prob > threshold_long).sum()
+        mask = y_prob > threshold_long
+        traded = r_fwd[mask] - costs
+        
+        if len(y_prob) > 0:
+            metrics['total_return'] = np.prod(1 + traded) - 1
+            # Share of all bars (traded or not) with a positive PnL
+            metrics['win_rate'] = np.count_nonzero(traded > 0) / len(y_prob)
+            metrics['n_trades'] = np.count_nonzero(mask)
         else:
             metrics['total_return'] = 0
             metrics['win_rate'] = 0
@@ -209,31 +281,25 @@ class WalkForwardBacktester:
     
     def _calculate_summary_metrics(
         self,
-        df: pd.DataFrame,
-        feature_cols: List[str],
-        test_indices: List[int],
-        predictions: List[float]
+        y_true: np.ndarray,
+        predictions: np.ndarray
     ) -> Dict[str, Any]:
-        """Calculate summary metrics across all folds."""
+        """Calculate summary metrics across all folds (labels and predictions in test order)."""
         if not self.results:
             return {}
         
         # Aggregate fold metrics
-        avg_auc = np.mean([r['auc'] for r in self.results])
-        avg_brier = np.mean([r['brier'] for r in self.results])
-        avg_accuracy = np.mean([r['accuracy'] for r in self.results])
-        total_return = np.prod([1 + r['total_return'] for r in self.results]) - 1
+        res_df = self.results_df
+        avg_auc, avg_brier, avg_accuracy = res_df[['auc', 'brier', 'accuracy']].mean()
+        total_return = (1 + res_df['total_return']).prod() - 1
         
         # Calculate on all predictions
-        if test_indices:
-            all_y_true = df.loc[test_indices, 'y'].values
-            all_y_prob = np.array(predictions)
-            
-            if len(np.unique(all_y_true)) > 1:
-                overall_auc = roc_auc_score(all_y_true, all_y_prob)
+        if len(y_true):
+            if _has_both_classes(y_true):
+                overall_auc = roc_auc_score(y_true, predictions)
             else:
                 overall_auc = 0.5
-            overall_brier = brier_score_loss(all_y_true, all_y_prob)
+            overall_brier = brier_score_loss(y_true, predictions)
         else:
             overall_auc = avg_auc
             overall_brier = avg_brier
@@ -246,48 +312,57 @@ class WalkForwardBacktester:
             'overall_auc': round(overall_auc, 4),
             'overall_brier': round(overall_brier, 4),
             'total_return': round(total_return, 4),
-            'total_samples': sum(r['test_size'] for r in self.results)
+            'total_samples': int(res_df['test_size'].sum())
         }
     
     def plot_fold_metrics(self, output_path: Optional[str] = None) -> None:
         """
         Plot metrics across folds.
         
+        When saving to a file the figure is drawn on a standalone (Agg)
+        Figure, without pyplot state or a GUI backend.
+        
         Args:
-            output_path: Path to save the plot.
+            output_path: Path to save the plot. If None, the plot is shown.
         """
         if not self.results:
             logger.warning("No results to plot")
             return
         
-        fig, axes = plt.subplots(2, 2, figsize=(12, 8))
+        if output_path:
+            fig = Figure(figsize=(12, 8))
+            axes = fig.subplots(2, 2)
+        else:
+            fig, axes = plt.subplots(2, 2, figsize=(12, 8))
         
-        iterations = [r['iteration'] for r in self.results]
+        res_df = self.results_df
+        iterations = res_df['iteration'].values
         
         # AUC
-        axes[0, 0].plot(iterations, [r['auc'] for r in self.results], 'b-o')
+        axes[0, 0].plot(iterations, res_df['auc'].values, 'b-o')
         axes[0, 0].axhline(y=0.5, color='gray', linestyle='--', alpha=0.7)
         axes[0, 0].set_title('AUC por Fold')
         axes[0, 0].set_xlabel('Iteração')
         axes[0, 0].set_ylabel('AUC')
         
         # Brier Score
-        axes[0, 1].plot(iterations, [r['brier'] for r in self.results], 'r-o')
+        axes[0, 1].plot(iterations, res_df['brier'].values, 'r-o')
         axes[0, 1].axhline(y=0.25, color='gray', linestyle='--', alpha=0.7)
         axes[0, 1].set_title('Brier Score por Fold')
         axes[0, 1].set_xlabel('Iteração')
         axes[0, 1].set_ylabel('Brier')
         
         # Return
-        axes[1, 0].bar(iterations, [r['total_return'] * 100 for r in self.results], 
-                       color=['green' if r['total_return'] > 0 else 'red' for r in self.results])
+        returns = res_df['total_return'].values
+        axes[1, 0].bar(iterations, returns * 100, 
+                       color=np.where(returns > 0, 'green', 'red'))
         axes[1, 0].axhline(y=0, color='gray', linestyle='-', alpha=0.7)
         axes[1, 0].set_title('Retorno por Fold')
         axes[1, 0].set_xlabel('Iteração')
         axes[1, 0].set_ylabel('Retorno (%)')
         
         # Cumulative Return
-        cumulative = np.cumprod([1 + r['total_return'] for r in self.results])
+        cumulative = np.cumprod(1 + returns)
         axes[1, 1].plot(iterations, cumulative, 'g-o')
         axes[1, 1].axhline(y=1, color='gray', linestyle='--', alpha=0.7)
         axes[1, 1].fill_between(iterations, 1, cumulative, alpha=0.3, color='green')
@@ -295,18 +370,18 @@ class WalkForwardBacktester:
         axes[1, 1].set_xlabel('Iteração')
         axes[1, 1].set_ylabel('Equity')
         
-        plt.tight_layout()
+        # tight_layout already fits the labels, so skip bbox_inches='tight' (an extra render pass)
+        fig.tight_layout()
         
         if output_path:
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
+            fig.savefig(output_path, dpi=150)
             logger.info(f"Walk-forward plot saved to {output_path}")
-            plt.close()
         else:
             plt.show()
 
 
 def run_walk_forward(
-    data_path: str = 'data/training_set.csv',
+    data_path: str = 'data/training_set.parquet',
     threshold: float = 0.62,
     costs_bps: int = 10,
     output_dir: str = 'outputs'
@@ -315,7 +390,7 @@ def run_walk_forward(
     Convenience function to run walk-forward backtest.
     
     Args:
-        data_path: Path to training data CSV.
+        data_path: Path to training data (.parquet or .csv).
         threshold: Long threshold.
         costs_bps: Transaction costs.
         output_dir: Output directory.
@@ -325,8 +400,11 @@ def run_walk_forward(
     """
     from pathlib import Path
     
-    df = pd.read_csv(data_path)
-    df['bucket_start'] = pd.to_datetime(df['bucket_start'])
+    if data_path.endswith('.parquet'):
+        df = pd.read_parquet(data_path)
+    else:
+        # Multi-threaded Arrow parser; bucket_start is parsed as part of the read
+        df = pd.read_csv(data_path, engine='pyarrow', parse_dates=['bucket_start'])
     
     backtester = WalkForwardBacktester(
         train_size=0.6,
@@ -0,0 +1,105 @@
+"""
+Chart Utils - Numeric helpers for the dashboard's line charts.
+
+Kept free of Streamlit so the helpers can be imported (and tested) outside
+the dashboard script.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Line charts never send more points per trace than this to the browser
+MAX_PLOT_POINTS = 2000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    
+    Args:
+        x: Sorted x values as floats.
+        y: y values as floats, same length as x.
+        n_out: Number of points to keep.
+        
+    Returns:
+        Indices of the n_out points that best keep the visual shape of (x, y);
+        all indices when n_out >= len(x) or n_out < 3.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Point in this bucket forming the largest triangle with the last kept point and next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def downsample_for_plot(df: pd.DataFrame, x: str, y: str, by: Optional[str] = None,
+                        max_points: int = MAX_PLOT_POINTS) -> pd.DataFrame:
+    """
+    Rows to plot for a line chart, LTTB-downsampled per trace once a trace exceeds max_points.
+    
+    Args:
+        df: Data to plot.
+        x: Column on the x axis (numeric or datetime).
+        y: Column on the y axis.
+        by: Optional column splitting df into one trace per value.
+        max_points: Largest number of points kept per trace.
+        
+    Returns:
+        df itself when every trace fits, otherwise the kept rows of each trace
+        sorted by x (rows with a missing y are dropped).
+    """
+    groups = df.groupby(by, sort=False, observed=True) if by else [(None, df)]
+    if all(len(g) <= max_points for _, g in groups):
+        return df
+    parts = []
+    for _, g in groups:
+        g = g[g[y].notna()].sort_values(x)
+        xs = g[x].to_numpy()
+        xs = xs.astype('datetime64[ns]').view('i8') if np.issubdtype(xs.dtype, np.datetime64) else xs
+        keep = lttb_indices(xs.astype(float), g[y].to_numpy(dtype=float), max_points)
+        parts.append(g.iloc[keep])
+    return pd.concat(parts)
+
+
+def rolling_corr(x, y, window: int) -> np.ndarray:
+    """
+    Trailing-window Pearson correlation, as Series.rolling(window).corr.
+    
+    Computed on strided window views in one vectorized pass.
+    
+    Args:
+        x: First series.
+        y: Second series, same length as x.
+        window: Number of observations per window.
+        
+    Returns:
+        Array of len(x) correlations; the first window - 1 entries and windows
+        with a NaN or zero variance are NaN (pandas gives inf for the latter).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    xw = np.lib.stride_tricks.sliding_window_view(x, window)
+    yw = np.lib.stride_tricks.sliding_window_view(y, window)
+    xd = xw - xw.mean(axis=1, keepdims=True)
+    yd = yw - yw.mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (xd * yd).sum(axis=1) / np.sqrt((xd ** 2).sum(axis=1) * (yd ** 2).sum(axis=1))
+    out[window - 1:] = np.where(np.isfinite(r), np.clip(r, -1, 1), np.nan)
+    return out
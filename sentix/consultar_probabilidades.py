@@ -23,45 +23,44 @@ def treinar_ou_carregar_modelo():
         model = ProbModel.load(model_path)
     else:
         print("Modelo não encontrado. Treinando novo modelo com dados demo...")
-        if not os.path.exists('data/training_set.csv'):
+        if not os.path.exists('data/training_set.parquet'):
             print("Dados de treinamento não encontrados. Execute demo_data_generator.py primeiro.")
             return None
 
-        ProbModel.train_and_save('data/training_set.csv', model_path)
+        ProbModel.train_and_save('data/training_set.parquet', model_path)
         model = ProbModel.load(model_path)
         print("Modelo treinado e salvo.")
 
     return model
 
-def obter_tickers_disponiveis():
-    """Retorna lista de tickers disponíveis nos dados."""
-    if not os.path.exists('data/sentiment_bars.csv'):
-        print("Dados de sentiment_bars não encontrados.")
-        return []
+# Features numéricas usadas pelo modelo
+FEATURES = ['mean_sent', 'std_sent', 'min_sent', 'max_sent', 'count', 'unc_mean', 'time_decay_mean']
 
-    df = pd.read_csv('data/sentiment_bars.csv')
-    return sorted(df['ticker'].unique())
-
-def obter_features_recentes(ticker):
-    """Obtém as features mais recentes para um ticker."""
+def carregar_sentiment_bars():
+    """Lê data/sentiment_bars.csv uma única vez (None se não existir)."""
     if not os.path.exists('data/sentiment_bars.csv'):
+        print("Dados de sentiment_bars não encontrados.")
         return None
 
     df = pd.read_csv('data/sentiment_bars.csv')
     df['bucket_start'] = pd.to_datetime(df['bucket_start'])
+    return df
 
-    # Filtrar por ticker e pegar o mais recente
-    ticker_data = df[df['ticker'] == ticker]
-    if ticker_data.empty:
-        return None
+def obter_tickers_disponiveis(df):
+    """Retorna lista de tickers disponíveis nos dados."""
+    if df is None:
+        return []
 
-    recent_data = ticker_data.sort_values('bucket_start').iloc[-1]
+    return sorted(df['ticker'].unique())
+
+def obter_features_recentes(df, tickers):
+    """Obtém as features mais recentes de cada ticker, indexadas pelo ticker."""
+    ticker_data = df[df['ticker'].isin(tickers)]
 
-    # Selecionar apenas as features numéricas
-    features = ['mean_sent', 'std_sent', 'min_sent', 'max_sent', 'count', 'unc_mean', 'time_decay_mean']
-    feature_values = recent_data[features].fillna(0)
+    # Última barra de cada ticker numa única passada
+    recent_data = ticker_data.sort_values('bucket_start', kind='stable').groupby('ticker', sort=False).tail(1)
 
-    return pd.DataFrame([feature_values])
+    return recent_data.set_index('ticker')[FEATURES].fillna(0)
 
 def interpretar_probabilidade(probabilidade):
     """Interpreta a probabilidade de subida."""
@@ -74,29 +73,43 @@ def interpretar_probabilidade(probabilidade):
     else:
         return "ALTA probabilidade de DESCIDA"
 
-def consultar_ticker(model, ticker):
-    """Consulta probabilidade para um ticker específico."""
-    # Obter features
-    features_df = obter_features_recentes(ticker)
-    if features_df is None or features_df.empty:
-        print(f"Nenhum dado recente encontrado para {ticker}.")
+def exibir_probabilidade(ticker, prob):
+    """Mostra a probabilidade de subida de um ticker."""
+    interpretacao = interpretar_probabilidade(prob)
+
+    print(f"\n{'='*50}")
+    print(f"TICKER: {ticker}")
+    print(f"Probabilidade de subida: {prob:.1%}")
+    print(f"Interpretação: {interpretacao}")
+    print(f"{'='*50}\n")
+
+def consultar_tickers(model, df, tickers):
+    """Consulta probabilidades para vários tickers com uma única previsão."""
+    features_df = obter_features_recentes(df, tickers)
+
+    for ticker in tickers:
+        if ticker not in features_df.index:
+            print(f"Nenhum dado recente encontrado para {ticker}.")
+
+    features_df = features_df.reindex([t for t in tickers if t in features_df.index])
+    if features_df.empty:
         return
 
-    # Prever probabilidade
+    # Prever probabilidades
     try:
-        prob = model.predict_proba(features_df)[0]
-        interpretacao = interpretar_probabilidade(prob)
+        probs = model.predict_proba(features_df)
+    except Exception as e:
+        print(f"Erro ao calcular probabilidades para {', '.join(features_df.index)}: {e}")
+        return
 
-        print(f"\n{'='*50}")
-        print(f"TICKER: {ticker}")
-        print(f"Probabilidade de subida: {prob:.1%}")
-        print(f"Interpretação: {interpretacao}")
-        print(f"{'='*50}\n")
+    for ticker, prob in zip(features_df.index, probs):
+        exibir_probabilidade(ticker, prob)
 
-    except Exception as e:
-        print(f"Erro ao calcular probabilidade para {ticker}: {e}")
+def consultar_ticker(model, df, ticker):
+    """Consulta probabilidade para um ticker específico."""
+    consultar_tickers(model, df, [ticker])
 
-def modo_demo(model, tickers):
+def modo_demo(model, df, tickers):
     """Modo demonstração - consulta alguns tickers automaticamente."""
     print("\nMODO DEMO - Consultando probabilidades para alguns tickers:")
     print("-" * 60)
@@ -104,8 +117,7 @@ def modo_demo(model, tickers):
     # Selecionar alguns tickers para demo
     demo_tickers = tickers[:5]  # primeiros 5
 
-    for ticker in demo_tickers:
-        consultar_ticker(model, ticker)
+    consultar_tickers(model, df, demo_tickers)
 
 def main():
     import sys
@@ -136,8 +148,9 @@ def main():
     if model is None:
         return
 
-    # Obter tickers disponíveis
-    tickers = obter_tickers_disponiveis()
+    # Obter tickers disponíveis (CSV lido uma única vez)
+    sentiment_df = carregar_sentiment_bars()
+    tickers = obter_tickers_disponiveis(sentiment_df)
     if not tickers:
         print("Nenhum ticker encontrado nos dados.")
         return
@@ -145,7 +158,7 @@ def main():
     # Se ticker específico foi passado
     if ticker_especifico:
         if ticker_especifico in tickers:
-            consultar_ticker(model, ticker_especifico)
+            consultar_ticker(model, sentiment_df, ticker_especifico)
         else:
             print(f"Ticker {ticker_especifico} não encontrado. Tickers disponíveis: {', '.join(tickers)}")
         return
@@ -173,7 +186,7 @@ def main():
                     idx = int(escolha) - 1
                     if 0 <= idx < len(tickers):
                         ticker = tickers[idx]
-                        consultar_ticker(model, ticker)
+                        consultar_ticker(model, sentiment_df, ticker)
                     else:
                         print("Número inválido. Tente novamente.")
                         continue
@@ -183,11 +196,11 @@ def main():
                     continue
         else:
             # Modo demo por padrão
-            modo_demo(model, tickers)
+            modo_demo(model, sentiment_df, tickers)
 
     except Exception:
         # Em caso de erro, executar modo demo
-        modo_demo(model, tickers)
+        modo_demo(model, sentiment_df, tickers)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
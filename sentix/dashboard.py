@@ -6,7 +6,9 @@ from datetime import datetime, timedelta
 import yfinance as yf
 import numpy as np
 from models.prob_model import ProbModel
+from chart_utils import downsample_for_plot, rolling_corr
 import os
+import time
 
 # Page configuration
 st.set_page_config(
@@ -49,16 +51,39 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Sentiment bars: the Parquet sibling (written by features.aggregate) is read when it is
+# at least as new as the CSV, otherwise the CSV is parsed; the dashboard never writes either
+SENTIMENT_BARS_CSV = 'data/sentiment_bars.csv'
+SENTIMENT_BARS_PARQUET = 'data/sentiment_bars.parquet'
+SENTIMENT_FLOAT_COLS = ['mean_sent', 'std_sent', 'min_sent', 'max_sent', 'unc_mean', 'time_decay_mean']
+
+def _parquet_is_fresh():
+    if not os.path.exists(SENTIMENT_BARS_PARQUET):
+        return False
+    return (not os.path.exists(SENTIMENT_BARS_CSV) or
+            os.path.getmtime(SENTIMENT_BARS_PARQUET) >= os.path.getmtime(SENTIMENT_BARS_CSV))
+
 # Load data
 @st.cache_data
 def load_sentiment_data():
-    df = pd.read_csv('data/sentiment_bars.csv')
-    df['bucket_start'] = pd.to_datetime(df['bucket_start'], errors='coerce')
+    if _parquet_is_fresh():
+        df = pd.read_parquet(SENTIMENT_BARS_PARQUET)
+    else:
+        df = pd.read_csv(SENTIMENT_BARS_CSV, engine='pyarrow')
+        df['bucket_start'] = pd.to_datetime(df['bucket_start'], errors='coerce')
     df['bucket_start'] = df['bucket_start'].dt.tz_localize(None)
     # Keep bucket_start as naive datetime for proper filtering/plotting
+    # Categorical ticker: isin on every rerun compares int codes instead of hashing strings
+    df['ticker'] = df['ticker'].astype('category')
+    # Narrow numeric dtypes halve the cached frame; count stays float if it has gaps
+    float_cols = [c for c in SENTIMENT_FLOAT_COLS if c in df.columns]
+    df[float_cols] = df[float_cols].astype(np.float32)
+    if 'count' in df.columns and not df['count'].isna().any():
+        df['count'] = df['count'].astype(np.int32)
     return df
 
-@st.cache_data
+# The model is shared as-is across sessions instead of being pickled into the data cache
+@st.cache_resource
 def load_prob_model():
     model_path = 'outputs/prob_model.pkl'
     if os.path.exists(model_path):
@@ -73,23 +98,86 @@ def calculate_probabilities(df, _model):
         return df
     # Selecionar features
     features = ['mean_sent', 'std_sent', 'min_sent', 'max_sent', 'count', 'unc_mean', 'time_decay_mean']
-    X = df[features].fillna(0)
-    probs = _model.predict_proba(X)
-    df = df.copy()
-    df['probability'] = probs
-    return df
+    # float32 halves the feature matrix; the DataFrame keeps ProbModel's by-name column alignment
+    X = df[features].fillna(0).astype(np.float32)
+    # assign returns a new frame, so the cached input is never mutated and no extra full copy is made
+    return df.assign(probability=_model.predict_proba(X))
+
+# Downloaded prices also persist on disk, so restarted workers skip Yahoo until the TTL expires
+PRICE_CACHE_DIR = 'data/price_cache'
+PRICE_CACHE_TTL_SECONDS = 12 * 3600
+
+def _price_cache_path(symbol, period):
+    return os.path.join(PRICE_CACHE_DIR, f"dashboard_{symbol.replace(os.sep, '_')}_{period}.parquet")
 
 @st.cache_data
 def load_price_data(symbol, period='6mo'):
+    cache_path = _price_cache_path(symbol, period)
+    try:
+        if time.time() - os.path.getmtime(cache_path) <= PRICE_CACHE_TTL_SECONDS:
+            return pd.read_parquet(cache_path)
+    except Exception:
+        pass  # Missing or unreadable cache: download
     try:
         data = yf.download(symbol, period=period)
         if isinstance(data.columns, pd.MultiIndex):
             data.columns = data.columns.droplevel(1)
         data.reset_index(inplace=True)
         data['Date'] = data['Date'].dt.tz_localize(None)  # Make datetime naive to match sentiment data
-        return data
     except:
         return pd.DataFrame()
+    if not data.empty:
+        try:
+            os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+            data.to_parquet(cache_path, index=False)
+        except Exception:
+            pass  # Cache is best effort
+    return data
+
+# Inner join of sentiment bars to prices on the exact bar timestamp (as pd.merge on
+# bucket_start == Date), probing a sorted Date index instead of hashing both sides
+def join_prices(sent_df, price_df):
+    prices = price_df.set_index('Date')
+    if not prices.index.is_monotonic_increasing:
+        prices = prices.sort_index()
+    merged = sent_df.join(prices, on='bucket_start', how='inner')
+    merged['Date'] = merged['bucket_start']
+    return merged.reset_index(drop=True)
+
+# Above this many rows the validation chart shows weekly up/down shares instead of one marker per bar
+VALIDATION_MARKER_LIMIT = 500
+
+# CSV export of the filtered view, rebuilt only when the filters change (not on every rerun)
+@st.cache_data(max_entries=4)
+def filtered_csv(df):
+    return df.to_csv(index=False).encode('utf-8')
+
+# Dense bucket x ticker probability matrix (one contiguous float32 column per ticker, NaN where
+# a ticker has no bar), cached so widget reruns with the same selection skip the rebuild
+@st.cache_data(max_entries=4)
+def build_prob_matrix(df):
+    codes_b, _ = pd.factorize(df['bucket_start'])
+    codes_t, tickers = pd.factorize(df['ticker'], sort=True)
+    mat = np.full((codes_b.max() + 1 if len(codes_b) else 0, len(tickers)), np.nan, dtype=np.float32, order='F')
+    mat[codes_b, codes_t] = df['probability'].to_numpy(dtype=np.float32)
+    return [str(t) for t in tickers], mat
+
+# Pairwise-complete Pearson correlation of probability between tickers (same result as
+# pivot(...).corr()); sums are taken in float64 so the one-pass formula stays accurate
+def probability_correlation(df):
+    tickers, mat = build_prob_matrix(df)
+    valid = (~np.isnan(mat)).astype(float)
+    values = np.nan_to_num(mat).astype(float)
+    n = valid.T @ valid                   # rows where both tickers have a value
+    sums = values.T @ valid               # sum of ticker i over those rows
+    sq_sums = (values ** 2).T @ valid
+    cov = n * (values.T @ values) - sums * sums.T
+    var = n * sq_sums - sums ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var * var.T)
+
+    index = pd.Index(tickers, name='ticker')
+    return pd.DataFrame(np.clip(corr, -1, 1), index=index, columns=index)
 
 # Main app
 st.markdown('<h1 class="main-header">📊 Sentix - Dashboard de Probabilidades de Ações</h1>', unsafe_allow_html=True)
@@ -103,7 +191,7 @@ sentiment_df = calculate_probabilities(sentiment_df, prob_model)
 st.sidebar.header("🔧 Filtros")
 
 # Entity filter
-entities = sentiment_df['ticker'].unique()
+entities = sentiment_df['ticker'].unique().tolist()
 selected_entities = st.sidebar.multiselect("Selecionar Ativos", entities, default=entities)
 
 # Date filter
@@ -116,11 +204,13 @@ if len(date_range) == 2:
 else:
     start_date, end_date = min_date, max_date
 
-# Filter data
+# Filter data: compare raw datetime64 values against day bounds (end day inclusive)
+# instead of building a Python date per row on every rerun
+bucket_ts = sentiment_df['bucket_start'].to_numpy()
 filtered_df = sentiment_df[
-    (sentiment_df['ticker'].isin(selected_entities)) &
-    (sentiment_df['bucket_start'].dt.date >= start_date) &
-    (sentiment_df['bucket_start'].dt.date <= end_date)
+    (sentiment_df['ticker'].isin(selected_entities)).to_numpy() &
+    (bucket_ts >= np.datetime64(start_date, 'D')) &
+    (bucket_ts < np.datetime64(end_date, 'D') + 1)
 ]
 
 # Tabs
@@ -161,14 +251,16 @@ with tab1:
 
     with col1:
         if not filtered_df.empty and 'probability' in filtered_df.columns:
-            fig = px.line(filtered_df, x='bucket_start', y='probability', color='ticker',
+            fig = px.line(downsample_for_plot(filtered_df, 'bucket_start', 'probability', by='ticker'),
+                          x='bucket_start', y='probability', color='ticker',
                           title='Evolução da Probabilidade de Subida', template='plotly_white')
             fig.update_layout(height=300, yaxis_tickformat='.1%')
             st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         if not filtered_df.empty:
-            fig = px.line(filtered_df, x='bucket_start', y='mean_sent', color='ticker',
+            fig = px.line(downsample_for_plot(filtered_df, 'bucket_start', 'mean_sent', by='ticker'),
+                          x='bucket_start', y='mean_sent', color='ticker',
                           title='Evolução do Sentimento', template='plotly_white')
             fig.update_layout(height=300)
             st.plotly_chart(fig, use_container_width=True)
@@ -211,13 +303,15 @@ with tab3:
             price_df = load_price_data(selected_entity)
             if not price_df.empty:
                 sent_entity = sentiment_df[sentiment_df['ticker'] == selected_entity]
-                merged_df = pd.merge(sent_entity, price_df, left_on='bucket_start', right_on='Date', how='inner')
+                merged_df = join_prices(sent_entity, price_df)
 
                 if not merged_df.empty and 'probability' in merged_df.columns:
+                    prob_points = downsample_for_plot(merged_df, 'bucket_start', 'probability')
+                    price_points = downsample_for_plot(merged_df, 'bucket_start', 'Close')
                     fig = go.Figure()
-                    fig.add_trace(go.Scatter(x=merged_df['bucket_start'], y=merged_df['probability'],
+                    fig.add_trace(go.Scatter(x=prob_points['bucket_start'], y=prob_points['probability'],
                                             mode='lines', name='Probabilidade de Subida', line=dict(color='#1f77b4')))
-                    fig.add_trace(go.Scatter(x=merged_df['bucket_start'], y=merged_df['Close'],
+                    fig.add_trace(go.Scatter(x=price_points['bucket_start'], y=price_points['Close'],
                                             mode='lines', name='Preço', yaxis='y2', line=dict(color='#ff7f0e')))
 
                     fig.update_layout(
@@ -236,8 +330,7 @@ with tab3:
     
     # Correlation matrix
     if len(selected_entities) > 1 and 'probability' in filtered_df.columns:
-        pivot_df = filtered_df.pivot(index='bucket_start', columns='ticker', values='probability')
-        corr_matrix = pivot_df.corr()
+        corr_matrix = probability_correlation(filtered_df)
 
         fig = px.imshow(corr_matrix, text_auto=True, title='Matriz de Correlação da Probabilidade de Subida',
                         template='plotly_white', color_continuous_scale='RdBu_r')
@@ -259,13 +352,7 @@ with tab5:
             
             if not val_price_df.empty and not val_sent_df.empty:
                 # Merge data
-                val_merged = pd.merge(
-                    val_sent_df, 
-                    val_price_df, 
-                    left_on='bucket_start', 
-                    right_on='Date', 
-                    how='inner'
-                )
+                val_merged = join_prices(val_sent_df, val_price_df)
                 
                 if not val_merged.empty and 'probability' in val_merged.columns:
                     # Calculate returns
@@ -288,24 +375,38 @@ with tab5:
                         marker=dict(size=6)
                     ))
                     
-                    # Actual up/down markers
-                    up_mask = val_merged['actual_up'] == 1
-                    fig.add_trace(go.Scatter(
-                        x=val_merged.loc[up_mask, 'bucket_start'],
-                        y=[1.05] * up_mask.sum(),
-                        mode='markers',
-                        name='Subiu (Real)',
-                        marker=dict(color='green', size=10, symbol='triangle-up')
-                    ))
-                    
-                    down_mask = val_merged['actual_up'] == 0
-                    fig.add_trace(go.Scatter(
-                        x=val_merged.loc[down_mask, 'bucket_start'],
-                        y=[-0.05] * down_mask.sum(),
-                        mode='markers',
-                        name='Desceu (Real)',
-                        marker=dict(color='red', size=10, symbol='triangle-down')
-                    ))
+                    # Actual up/down markers (one per bar up to VALIDATION_MARKER_LIMIT rows,
+                    # then weekly up/down shares so the marker count stays bounded)
+                    if len(val_merged) <= VALIDATION_MARKER_LIMIT:
+                        up_mask = val_merged['actual_up'] == 1
+                        fig.add_trace(go.Scatter(
+                            x=val_merged.loc[up_mask, 'bucket_start'],
+                            y=[1.05] * up_mask.sum(),
+                            mode='markers',
+                            name='Subiu (Real)',
+                            marker=dict(color='green', size=10, symbol='triangle-up')
+                        ))
+                        
+                        down_mask = val_merged['actual_up'] == 0
+                        fig.add_trace(go.Scatter(
+                            x=val_merged.loc[down_mask, 'bucket_start'],
+                            y=[-0.05] * down_mask.sum(),
+                            mode='markers',
+                            name='Desceu (Real)',
+                            marker=dict(color='red', size=10, symbol='triangle-down')
+                        ))
+                    else:
+                        weekly = val_merged.groupby(pd.Grouper(key='bucket_start', freq='W'))['actual_up'].agg(['sum', 'count'])
+                        weekly = weekly[weekly['count'] > 0]
+                        share_up = weekly['sum'] / weekly['count']
+                        fig.add_trace(go.Bar(
+                            x=weekly.index, y=share_up * 0.1, base=1.0,
+                            name='Subiu (Real, % na semana)', marker_color='green', opacity=0.6
+                        ))
+                        fig.add_trace(go.Bar(
+                            x=weekly.index, y=-(1 - share_up) * 0.1, base=0.0,
+                            name='Desceu (Real, % na semana)', marker_color='red', opacity=0.6
+                        ))
                     
                     # Threshold lines
                     fig.add_hline(y=0.62, line_dash='dash', line_color='green', 
@@ -359,12 +460,13 @@ with tab5:
                     st.subheader("📉 Correlação Rolling (30 dias)")
                     
                     if len(val_merged) > 30:
-                        val_merged['rolling_corr'] = val_merged['probability'].rolling(window=4).corr(
-                            val_merged['Close'].pct_change().shift(-1)
+                        val_merged['rolling_corr'] = rolling_corr(
+                            val_merged['probability'], val_merged['Close'].pct_change().shift(-1), window=4
                         )
                         
                         fig_corr = px.line(
-                            val_merged, x='bucket_start', y='rolling_corr',
+                            downsample_for_plot(val_merged, 'bucket_start', 'rolling_corr'),
+                            x='bucket_start', y='rolling_corr',
                             title='Correlação Rolling: Probabilidade vs Retorno Futuro',
                             template='plotly_white'
                         )
@@ -383,7 +485,7 @@ with tab4:
 
     # Export button
     if not filtered_df.empty:
-        csv = filtered_df.to_csv(index=False)
+        csv = filtered_csv(filtered_df)
         st.download_button(
             label="📥 Baixar Dados Filtrados como CSV",
             data=csv,
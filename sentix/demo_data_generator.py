@@ -267,7 +267,7 @@ class DemoDataGenerator:
 
         # Update main data files for demo
         articles_df.to_csv("data/articles_raw.csv", index=False)
-        training_df.to_csv("data/training_set.csv", index=False)
+        training_df.to_parquet("data/training_set.parquet", index=False)
 
         print(f"Generated {len(articles_df)} articles, {len(prices_df)} price points, {len(training_df)} training samples")
 
@@ -5,12 +5,13 @@ This module builds sentiment bars by aggregating article-level sentiment
 into ticker-time bucket features with various statistical measures.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import pandas as pd
 import yaml
 import numpy as np
 from datetime import datetime
 import logging
+import os
 
 from sentiment.finbert import FinBertSentiment
 
@@ -99,12 +100,22 @@ def build_sentiment_bars(
     
     # Save to file
     output_path = 'data/sentiment_bars.csv'
-    bars_df.to_csv(output_path, index=False)
+    _write_atomic(output_path, lambda path: bars_df.to_csv(path, index=False))
+    # Columnar copy for the readers (API, dashboard, alert monitor); written after the
+    # CSV so its mtime marks it as current
+    _write_atomic('data/sentiment_bars.parquet', lambda path: bars_df.to_parquet(path, index=False))
     logger.info(f"Saved {len(bars_df)} sentiment bars to {output_path}")
     
     return bars_df
 
 
+def _write_atomic(path: str, write: Callable[[str], None]) -> None:
+    """Write to a temporary file and rename it over path, so readers never see a partial file."""
+    tmp_path = path + '.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
 def _load_config(config_path: str) -> Dict[str, Any]:
     """Load configuration from YAML file."""
     with open(config_path, 'r', encoding='utf-8') as f:
@@ -31,7 +31,7 @@ def main():
         logger.info("Treinando modelo...")
         from models.prob_model import ProbModel
 
-        ProbModel.train_and_save('data/training_set.csv', 'outputs/prob_model.pkl')
+        ProbModel.train_and_save('data/training_set.parquet', 'outputs/prob_model.pkl')
         logger.info("Modelo treinado e salvo com sucesso")
 
         # 3. Verificar se os arquivos foram criados
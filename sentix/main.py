@@ -16,7 +16,7 @@ from ingest.normalize import load_ticker_map, map_entities
 from features.aggregate import build_sentiment_bars
 from backtest.label import make_labels
 from models.prob_model import ProbModel
-from backtest.backtester import run
+from backtest.backtester import run, wait_for_outputs
 
 # Set seeds for determinism
 np.random.seed(42)
@@ -99,7 +99,7 @@ def main() -> None:
 
     # 5) Train model
     logger.info("Step 5/6: Training probability model")
-    ProbModel.train_and_save('data/training_set.csv', 'outputs/prob_model.pkl')
+    ProbModel.train_and_save('data/training_set.parquet', 'outputs/prob_model.pkl')
     logger.info("✓ Model saved to outputs/prob_model.pkl")
 
     # 6) Backtest
@@ -110,6 +110,7 @@ def main() -> None:
         threshold_long=config['signals']['threshold_long'],
         costs_bps=config['signals']['costs_bps']
     )
+    wait_for_outputs()
 
     # Summary
     logger.info("=" * 60)
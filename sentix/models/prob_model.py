@@ -6,12 +6,13 @@ for predicting the probability of positive price movements based on
 sentiment features.
 """
 
-from typing import List, Optional
+from typing import List, Optional, Union
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.calibration import CalibratedClassifierCV
-import pickle
+from sklearn.base import clone
+import joblib
 import re
 import logging
 
@@ -48,22 +49,41 @@ class ProbModel:
         # Preserve feature columns/order used in training
         self.feature_cols: Optional[List[str]] = None
         
-    def fit(self, X: pd.DataFrame, y: pd.Series) -> 'ProbModel':
+    def clone(self) -> 'ProbModel':
+        """
+        Return an unfitted model with the same estimator parameters.
+        
+        Uses sklearn's clone, so no constructor logic runs and each copy
+        starts from the template's parameter state.
+        
+        Returns:
+            New, unfitted ProbModel.
+        """
+        model = ProbModel.__new__(ProbModel)
+        model.model = clone(self.model)
+        model.feature_cols = None
+        return model
+
+    def fit(self, X: Union[pd.DataFrame, np.ndarray], y: Union[pd.Series, np.ndarray]) -> 'ProbModel':
         """
         Fit the model on training data.
         
         Args:
-            X: Feature DataFrame. NaN values will be filled with 0.
+            X: Feature DataFrame, or a feature array in a fixed column order.
+               NaN values will be filled with 0.
             y: Binary target series (0 or 1).
             
         Returns:
             Self for method chaining.
         """
-        X = X.fillna(0)
-        # Store feature order for consistent predictions
-        self.feature_cols = X.columns.tolist()
+        if isinstance(X, np.ndarray):
+            X = np.where(np.isnan(X), 0, X)
+        else:
+            X = X.fillna(0)
+            # Store feature order for consistent predictions
+            self.feature_cols = X.columns.tolist()
         
-        logger.info(f"Training ProbModel with {len(X)} samples and {len(self.feature_cols)} features")
+        logger.info(f"Training ProbModel with {X.shape[0]} samples and {X.shape[1]} features")
         self.model.fit(X, y)
         
         return self
@@ -86,17 +106,20 @@ class ProbModel:
         feature_cols = [col for col in X.columns if FEATURE_PATTERN.match(col)]
         return X[feature_cols].fillna(0)
 
-    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+    def predict_proba(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
         """
         Predict probability of positive class.
         
         Args:
             X: Feature DataFrame. Will be filtered and ordered to match
-               training features.
+               training features. An array is used as-is and must have
+               the training column order.
                
         Returns:
             Array of probabilities for positive class (P(y=1)).
         """
+        if isinstance(X, np.ndarray):
+            return self.model.predict_proba(np.where(np.isnan(X), 0, X))[:, 1]
         X_sel = self._select_features(X).fillna(0)
         return self.model.predict_proba(X_sel)[:, 1]
     
@@ -116,10 +139,10 @@ class ProbModel:
     @staticmethod
     def train_and_save(dataset_csv: str, model_path: str) -> 'ProbModel':
         """
-        Train a model from CSV data and save to file.
+        Train a model from CSV or Parquet data and save to file.
         
         Args:
-            dataset_csv: Path to training data CSV.
+            dataset_csv: Path to training data (.csv or .parquet).
                         Must have 'y' column and feature columns.
             model_path: Path to save the trained model (.pkl).
             
@@ -127,10 +150,13 @@ class ProbModel:
             Trained ProbModel instance.
             
         Example:
-            >>> model = ProbModel.train_and_save('data/training_set.csv', 'outputs/prob_model.pkl')
+            >>> model = ProbModel.train_and_save('data/training_set.parquet', 'outputs/prob_model.pkl')
         """
         logger.info(f"Loading training data from {dataset_csv}")
-        df = pd.read_csv(dataset_csv)
+        if dataset_csv.endswith('.parquet'):
+            df = pd.read_parquet(dataset_csv)
+        else:
+            df = pd.read_csv(dataset_csv)
         
         # Select feature columns
         feature_cols = [col for col in df.columns if FEATURE_PATTERN.match(col)]
@@ -142,9 +168,8 @@ class ProbModel:
         model.fit(X, y)
         model.feature_cols = feature_cols
 
-        # Save model
-        with open(model_path, 'wb') as f:
-            pickle.dump(model, f)
+        # Save model (joblib stores the numpy arrays raw, so load() can memory-map them)
+        joblib.dump(model, model_path)
         logger.info(f"Model saved to {model_path}")
         
         return model
@@ -154,6 +179,9 @@ class ProbModel:
         """
         Load a trained model from file.
         
+        Arrays are memory-mapped read-only, so processes loading the same
+        file share its pages. Plain pickle files from older versions still load.
+        
         Args:
             model_path: Path to the saved model (.pkl).
             
@@ -165,5 +193,4 @@ class ProbModel:
             pickle.UnpicklingError: If file is corrupted.
         """
         logger.info(f"Loading model from {model_path}")
-        with open(model_path, 'rb') as f:
-            return pickle.load(f)
\ No newline at end of file
+        return joblib.load(model_path, mmap_mode='r')
\ No newline at end of file
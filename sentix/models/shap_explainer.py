@@ -357,7 +357,7 @@ if __name__ == "__main__":
     # Load model and data
     try:
         model = ProbModel.load('outputs/prob_model.pkl')
-        df = pd.read_csv('data/training_set.csv')
+        df = pd.read_parquet('data/training_set.parquet')
         
         feature_cols = [col for col in df.columns if FEATURE_PATTERN.match(col)]
         X = df[feature_cols]
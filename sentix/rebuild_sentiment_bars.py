@@ -11,12 +11,10 @@ def rebuild_sentiment_bars():
     with open('config.yml', 'r') as f:
         config = yaml.safe_load(f)
 
-    # Build sentiment bars
+    # Build sentiment bars (build_sentiment_bars saves the CSV and its Parquet copy)
     print("Building sentiment bars from articles_raw.csv...")
     sentiment_df = build_sentiment_bars('data/articles_raw.csv', config['aggregation']['window'], 'config.yml')
 
-    # Save to sentiment_bars.csv
-    sentiment_df.to_csv('data/sentiment_bars.csv', index=False)
     print(f"Sentiment bars saved with {len(sentiment_df)} records")
     print("Unique tickers:", sentiment_df['ticker'].unique())
 
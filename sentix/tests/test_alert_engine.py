@@ -0,0 +1,231 @@
+"""
+Tests for the alert engine.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from alerts import engine as engine_module
+from alerts.engine import AlertEngine
+from alerts.rule import AlertRule
+from alerts.webhook import WebhookConfig
+
+
+@pytest.fixture
+def engine(temp_dir, monkeypatch):
+    """Alert engine whose data and log files live in a temporary directory."""
+    monkeypatch.chdir(temp_dir)
+    os.makedirs('data')
+    with open('config.yml', 'w') as f:
+        f.write('alerts:\n  enabled: false\n')
+
+    alert_engine = AlertEngine('config.yml')
+    yield alert_engine
+    alert_engine.logger.close()
+
+
+def _write_bars(df, path, mtime):
+    """Write bars to path and pin its mtime so file ordering is deterministic."""
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    os.utime(path, (mtime, mtime))
+
+
+class TestReadNewBars:
+    """Tests for picking up sentiment bar files on monitor ticks."""
+
+    def test_no_files(self, engine):
+        """Test that nothing is read before any bars are written."""
+        assert engine._read_new_bars() is None
+
+    def test_unchanged_file_is_not_reread(self, engine, sample_sentiment_bars_df):
+        """Test that a tick without a new write returns None."""
+        _write_bars(sample_sentiment_bars_df, engine_module.SENTIMENT_BARS_PARQUET, 1_000)
+
+        assert len(engine._read_new_bars()) == len(sample_sentiment_bars_df)
+        assert engine._read_new_bars() is None
+
+    def test_rewrite_returns_whole_file(self, engine, sample_sentiment_bars_df):
+        """Test that a rewrite with an appended bar is read in full."""
+        _write_bars(sample_sentiment_bars_df.iloc[:2], engine_module.SENTIMENT_BARS_PARQUET, 1_000)
+        assert len(engine._read_new_bars()) == 2
+
+        _write_bars(sample_sentiment_bars_df, engine_module.SENTIMENT_BARS_PARQUET, 2_000)
+        bars = engine._read_new_bars()
+
+        pd.testing.assert_frame_equal(bars, sample_sentiment_bars_df)
+
+    def test_csv_newer_than_parquet(self, engine, sample_sentiment_bars_df):
+        """Test that a CSV written after the Parquet copy is the one read."""
+        _write_bars(sample_sentiment_bars_df.iloc[:2], engine_module.SENTIMENT_BARS_PARQUET, 1_000)
+        _write_bars(sample_sentiment_bars_df, engine_module.SENTIMENT_BARS_CSV, 2_000)
+
+        bars = engine._read_new_bars()
+
+        assert len(bars) == len(sample_sentiment_bars_df)
+        assert bars['ticker'].tolist() == sample_sentiment_bars_df['ticker'].tolist()
+
+    def test_parquet_preferred_when_current(self, engine, sample_sentiment_bars_df):
+        """Test that the Parquet copy wins once it is at least as new as the CSV."""
+        _write_bars(sample_sentiment_bars_df.iloc[:1], engine_module.SENTIMENT_BARS_CSV, 1_000)
+        _write_bars(sample_sentiment_bars_df, engine_module.SENTIMENT_BARS_PARQUET, 1_000)
+
+        assert len(engine._read_new_bars()) == len(sample_sentiment_bars_df)
+
+
+def _scalar_fired(rules, latest_data, volatility_data=None):
+    """Reference: evaluate every rule on its own."""
+    return [rule for rule in rules if rule.conditions_met(latest_data, volatility_data)]
+
+
+class TestEvaluateRules:
+    """Tests that the grouped numpy path matches per-rule evaluation."""
+
+    OPERATORS = ['>', '<', '>=', '<=', '==', '!=', 'cross_above', 'cross_below']
+
+    def _rules(self):
+        """Single-condition rules across every operator plus rules that take the scalar path."""
+        rules = []
+        thresholds = [-0.5, -0.1, 0.0, 0.25, 0.3, 0.5]
+        for i, (op, value) in enumerate((op, v) for op in self.OPERATORS for v in thresholds):
+            rules.append(AlertRule(f'single_{i}', 'single', 'PETR4.SA',
+                                   [{'field': 'mean_sent', 'operator': op, 'value': value}], []))
+        for i, bounds in enumerate([[-0.2, 0.3], [0.3, 0.3], [0.4, 0.9]]):
+            for op in ('between', 'outside'):
+                rules.append(AlertRule(f'range_{op}_{i}', 'range', 'PETR4.SA',
+                                       [{'field': 'mean_sent', 'operator': op, 'value': bounds}], []))
+        rules += [
+            AlertRule('multi', 'multi', 'PETR4.SA', [
+                {'field': 'mean_sent', 'operator': '>', 'value': 0.1},
+                {'field': 'count', 'operator': '>=', 'value': 5},
+            ], []),
+            AlertRule('volatility', 'vol', 'PETR4.SA',
+                      [{'field': 'volatility', 'operator': '>', 'value': 0.02}], []),
+            AlertRule('missing_field', 'missing', 'PETR4.SA',
+                      [{'field': 'not_a_field', 'operator': '>', 'value': 0}], []),
+            AlertRule('nan_field', 'nan', 'PETR4.SA',
+                      [{'field': 'std_sent', 'operator': '<', 'value': 1}], []),
+            AlertRule('unknown_op', 'unknown', 'PETR4.SA',
+                      [{'field': 'mean_sent', 'operator': '~', 'value': 0}], []),
+        ]
+        return rules
+
+    @pytest.mark.parametrize('mean_sent', [-0.5, 0.0, 0.3, 0.9])
+    def test_matches_scalar_rules(self, engine, mean_sent):
+        """Test that the fired set equals evaluating each rule's conditions_met."""
+        rules = self._rules()
+        latest_data = {'mean_sent': mean_sent, 'std_sent': float('nan'), 'count': 5}
+        volatility_data = {'PETR4.SA': 0.03}
+
+        fired = engine._evaluate_rules(rules, latest_data, volatility_data)
+
+        expected = _scalar_fired(rules, latest_data, volatility_data)
+        assert sorted(r.rule_id for r in fired) == sorted(r.rule_id for r in expected)
+
+    def test_non_numeric_field_falls_back(self, engine):
+        """Test that a string field value is compared per rule like the scalar path."""
+        rules = [AlertRule(f'eq_{i}', 'eq', 'PETR4.SA',
+                           [{'field': 'label', 'operator': op, 'value': 1}], [])
+                 for i, op in enumerate(['==', '!='])]
+        latest_data = {'label': 'up'}
+
+        fired = engine._evaluate_rules(rules, latest_data, None)
+
+        assert [r.rule_id for r in fired] == [r.rule_id for r in _scalar_fired(rules, latest_data)]
+
+    def test_in_place_condition_edit(self, engine):
+        """Test that both paths see a threshold edited in place."""
+        rule = AlertRule('edited', 'edited', 'PETR4.SA',
+                         [{'field': 'mean_sent', 'operator': '>', 'value': 0}], [])
+        rule.conditions[0]['value'] = 5
+
+        assert engine._evaluate_rules([rule], {'mean_sent': 1}, None) == []
+        assert _scalar_fired([rule], {'mean_sent': 1}) == []
+
+
+def _reloaded(engine):
+    """Fresh engine built from what the given engine persisted."""
+    reloaded = AlertEngine(engine.config_path)
+    reloaded.logger.close()
+    return reloaded
+
+
+def _make_rule(i):
+    """Simple numbered rule; tickers alternate so the per-ticker index is exercised."""
+    ticker = 'PETR4.SA' if i % 2 else 'VALE3.SA'
+    return AlertRule(f'rule_{i}', f'Rule {i}', ticker,
+                     [{'field': 'mean_sent', 'operator': '>', 'value': i / 10}],
+                     [{'type': 'log'}])
+
+
+class TestRulePersistence:
+    """Tests that snapshot + change-log replay restores the in-memory state."""
+
+    def _assert_same_rules(self, engine, reloaded):
+        assert sorted(reloaded.list_rules(), key=lambda r: r['rule_id']) == \
+            sorted(engine.list_rules(), key=lambda r: r['rule_id'])
+        assert {t: sorted(r.rule_id for r in rules) for t, rules in reloaded.rules_by_ticker.items()} == \
+            {t: sorted(r.rule_id for r in rules) for t, rules in engine.rules_by_ticker.items()}
+
+    def test_replay_add_and_delete(self, engine):
+        """Test that adds, re-adds and deletes replay to the same rules."""
+        for i in range(5):
+            engine.add_rule(_make_rule(i))
+        engine.remove_rule('rule_1')
+        engine.add_rule(AlertRule('rule_2', 'Renamed', 'ITUB4.SA', [], []))
+        engine.remove_rule('missing')
+
+        assert not engine_module.RULES_SNAPSHOT.exists()
+        self._assert_same_rules(engine, _reloaded(engine))
+
+    def test_replay_after_compaction(self, engine, monkeypatch):
+        """Test that compaction folds the log into a snapshot without changing the state."""
+        monkeypatch.setattr(engine_module, 'COMPACTION_MIN_BYTES', 1)
+        for i in range(6):
+            engine.add_rule(_make_rule(i))
+            if i % 3 == 2:
+                engine.remove_rule(f'rule_{i - 1}')
+
+        assert engine_module.RULES_SNAPSHOT.exists()
+        self._assert_same_rules(engine, _reloaded(engine))
+
+        # Changes after a compaction land in a fresh log on top of the snapshot
+        monkeypatch.setattr(engine_module, 'COMPACTION_MIN_BYTES', 1 << 20)
+        engine.remove_rule('rule_0')
+        engine.add_rule(_make_rule(9))
+        self._assert_same_rules(engine, _reloaded(engine))
+
+    def test_torn_log_line_is_skipped(self, engine):
+        """Test that a partially written trailing entry does not block loading."""
+        engine.add_rule(_make_rule(1))
+        with open(engine_module.RULES_LOG, 'ab') as f:
+            f.write(b'{"op": "add", "rule": {"rule_')
+
+        reloaded = _reloaded(engine)
+
+        assert list(reloaded.rules) == ['rule_1']
+
+    def test_webhook_replay(self, engine):
+        """Test that webhook adds and deletes replay like rules."""
+        engine.add_webhook(WebhookConfig('https://a.example/hook'))
+        engine.add_webhook(WebhookConfig('https://b.example/hook', enabled=False))
+        engine.remove_webhook('https://a.example/hook')
+
+        assert _reloaded(engine).list_webhooks() == engine.list_webhooks()
+
+
+class TestMonitoring:
+    """Tests for starting and stopping background monitoring."""
+
+    def test_logging_after_stop(self, engine):
+        """Test that alerts logged after stop_monitoring are still recorded."""
+        engine.start_monitoring(check_interval=1)
+        engine.stop_monitoring()
+
+        engine.logger.log_alert_triggered('rule_1', 'Test rule', 'PETR4.SA', [], [], {})
+
+        assert engine.logger.get_alert_history()['rule_id'].tolist() == ['rule_1']
@@ -0,0 +1,166 @@
+"""
+Tests for the alert logger.
+"""
+
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from alerts.logger import AlertLogger
+
+
+@pytest.fixture
+def alert_logger(temp_dir):
+    """Alert logger writing to a temporary directory."""
+    logger = AlertLogger(os.path.join(temp_dir, 'alerts'))
+    yield logger
+    logger.close()
+
+
+def _log_alert(logger, rule_id='rule_1'):
+    """Log one triggered alert for PETR4.SA."""
+    logger.log_alert_triggered(
+        rule_id, 'Test rule', 'PETR4.SA',
+        [{'field': 'mean_sent', 'operator': '>', 'value': 0.2}],
+        [{'type': 'log'}],
+        {'sentiment_data': {'ticker': 'PETR4.SA', 'mean_sent': 0.3}}
+    )
+
+
+class TestQueuedWrites:
+    """Tests for the background log writer."""
+
+    def test_history_sees_just_logged_alert(self, alert_logger):
+        """Test that history reads wait for queued records."""
+        _log_alert(alert_logger)
+
+        history = alert_logger.get_alert_history()
+
+        assert history['rule_id'].tolist() == ['rule_1']
+
+    def test_close_writes_queued_records(self, alert_logger):
+        """Test that close flushes pending records to the log file."""
+        _log_alert(alert_logger)
+        alert_logger.close()
+
+        with open(alert_logger.current_log_file) as f:
+            assert 'ALERT_TRIGGERED' in f.read()
+
+    def test_close_is_idempotent_and_restartable(self, alert_logger):
+        """Test that a closed logger can be closed again and restarted."""
+        alert_logger.close()
+        alert_logger.close()
+
+        alert_logger.start()
+        _log_alert(alert_logger, 'rule_2')
+
+        assert alert_logger.get_alert_history()['rule_id'].tolist() == ['rule_2']
+
+
+def _full_parse(log_dir, rule_id=None, days=7):
+    """Reference: parse every line of every log file, as before the mmap scan."""
+    start_date = datetime.now() - timedelta(days=days)
+    all_logs = []
+    for log_file in Path(log_dir).glob('alerts_*.log'):
+        with open(log_file, 'r') as f:
+            for line in f:
+                if 'ALERT_TRIGGERED' in line:
+                    log_entry = json.loads(line.split('ALERT_TRIGGERED: ', 1)[1].strip())
+                    if datetime.fromisoformat(log_entry['timestamp']) >= start_date:
+                        if rule_id is None or log_entry['rule_id'] == rule_id:
+                            all_logs.append(log_entry)
+    return pd.DataFrame(all_logs)
+
+
+def _write_log_file(log_dir, day, entries, trailing_newline=True):
+    """Write a daily log file holding (time, level, kind, payload) entries in logger format."""
+    lines = []
+    for at, level, kind, payload in entries:
+        stamp = datetime.combine(day, at)
+        asctime = stamp.strftime('%Y-%m-%d %H:%M:%S') + ',000'
+        payload = dict(payload, timestamp=stamp.isoformat())
+        lines.append(f"{asctime} - {level} - {kind}: {json.dumps(payload)}")
+    text = '\n'.join(lines) + ('\n' if trailing_newline else '')
+    path = Path(log_dir) / f"alerts_{day.isoformat()}.log"
+    path.write_text(text)
+    # Like the live logger, the file was last written when its last entry was appended
+    last_write = stamp.timestamp()
+    os.utime(path, (last_write, last_write))
+
+
+class TestHistoryScan:
+    """Tests that the mmap history scan matches a full line-by-line parse."""
+
+    @pytest.fixture
+    def log_dir(self, temp_dir):
+        """Log directory with files inside, on and outside the history window."""
+        log_dir = Path(temp_dir) / 'history'
+        log_dir.mkdir()
+        today = date.today()
+
+        def alert(rule_id, ticker='PETR4.SA'):
+            return ('INFO', 'ALERT_TRIGGERED', {'event': 'alert_triggered', 'rule_id': rule_id,
+                                                'ticker': ticker, 'conditions': [], 'actions': []})
+
+        webhook = ('INFO', 'WEBHOOK_SENT', {'event': 'webhook_sent', 'rule_id': 'rule_1', 'success': True})
+        error = ('ERROR', 'RULE_ERROR', {'event': 'rule_error', 'rule_id': 'rule_2', 'error': 'boom'})
+
+        _write_log_file(log_dir, today, [
+            (time(9, 0), *alert('rule_1')), (time(9, 1), *webhook),
+            (time(9, 2), *alert('rule_2', 'VALE3.SA')), (time(9, 3), *error),
+        ])
+        _write_log_file(log_dir, today - timedelta(days=3), [
+            (time(12, 0), *alert('rule_1')), (time(12, 0), *alert('rule_3')),
+        ], trailing_newline=False)
+        # The file dated on the window start holds entries on both sides of the cutoff
+        _write_log_file(log_dir, today - timedelta(days=7), [
+            (time(0, 0, 1), *alert('rule_1')), (time(23, 59, 59), *alert('rule_2')),
+        ])
+        _write_log_file(log_dir, today - timedelta(days=10), [(time(12, 0), *alert('rule_1'))])
+        (log_dir / f"alerts_{(today - timedelta(days=1)).isoformat()}.log").write_text('')
+        return log_dir
+
+    @pytest.mark.parametrize('rule_id', [None, 'rule_1', 'rule_2', 'missing'])
+    @pytest.mark.parametrize('days', [1, 4, 7, 30])
+    def test_matches_full_parse(self, log_dir, rule_id, days):
+        """Test that every (rule_id, days) query returns the same entries."""
+        logger = AlertLogger(str(log_dir))
+        try:
+            history = logger.get_alert_history(rule_id=rule_id, days=days)
+        finally:
+            logger.close()
+
+        expected = _full_parse(log_dir, rule_id, days)
+
+        def key(df):
+            return sorted(zip(df['timestamp'], df['rule_id'])) if not df.empty else []
+
+        assert key(history) == key(expected)
+        assert len(history) == len(expected)
+        assert rule_id == 'missing' or not expected.empty
+
+    def test_long_running_file_is_read(self, log_dir):
+        """Test that a file opened before the window still yields its recent entries."""
+        today = date.today()
+        opened = today - timedelta(days=10)
+        payload = {'event': 'alert_triggered', 'rule_id': 'rule_9', 'ticker': 'PETR4.SA',
+                   'conditions': [], 'actions': []}
+        lines = []
+        for day in (opened, today):
+            stamp = datetime.combine(day, time(8, 0))
+            entry = json.dumps(dict(payload, timestamp=stamp.isoformat()))
+            lines.append(f"{stamp.strftime('%Y-%m-%d %H:%M:%S')},000 - INFO - ALERT_TRIGGERED: {entry}")
+        (log_dir / f"alerts_{opened.isoformat()}.log").write_text('\n'.join(lines) + '\n')
+
+        logger = AlertLogger(str(log_dir))
+        try:
+            history = logger.get_alert_history(rule_id='rule_9', days=7)
+        finally:
+            logger.close()
+
+        assert history['timestamp'].tolist() == [datetime.combine(today, time(8, 0)).isoformat()]
+
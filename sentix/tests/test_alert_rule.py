@@ -0,0 +1,69 @@
+"""
+Tests for alert rules.
+"""
+
+from alerts.rule import AlertRule
+
+
+def _rule(conditions):
+    """Single-ticker rule with no actions."""
+    return AlertRule('rule_1', 'Test rule', 'PETR4.SA', conditions, [])
+
+
+class TestConditions:
+    """Tests for condition evaluation."""
+
+    def test_in_place_edit_applies(self):
+        """Test that editing a condition in place changes what fires."""
+        rule = _rule([{'field': 'mean_sent', 'operator': '>', 'value': 0}])
+        assert rule.conditions_met({'mean_sent': 1})
+
+        rule.conditions[0]['value'] = 5
+
+        assert not rule.conditions_met({'mean_sent': 1})
+        assert rule.to_dict()['conditions'][0]['value'] == 5
+
+
+class TestSerialization:
+    """Tests for rule serialization."""
+
+    def test_to_dict_returns_copy(self):
+        """Test that mutating a returned dict does not change later to_dict output."""
+        rule = _rule([{'field': 'mean_sent', 'operator': '>', 'value': 0}])
+
+        rule.to_dict()['name'] = 'MUT'
+
+        assert rule.to_dict()['name'] == 'Test rule'
+
+    def test_to_dict_tracks_changes(self):
+        """Test that the memoized dict is rebuilt after a field changes."""
+        rule = _rule([{'field': 'mean_sent', 'operator': '>', 'value': 0}])
+        rule.to_dict()
+
+        rule.enabled = False
+
+        assert rule.to_dict()['enabled'] is False
+
+
+class TestEvaluate:
+    """Tests for the public evaluate entry point."""
+
+    def test_accepts_dataframe(self, sample_sentiment_bars_df):
+        """Test that evaluate still takes the sentiment bars DataFrame and uses the latest bar."""
+        # PETR4.SA's latest bar has mean_sent -0.1
+        assert _rule([{'field': 'mean_sent', 'operator': '<', 'value': 0}]).evaluate(sample_sentiment_bars_df)
+        assert not _rule([{'field': 'mean_sent', 'operator': '>', 'value': 0}]).evaluate(sample_sentiment_bars_df)
+
+    def test_accepts_latest_by_ticker(self, sample_sentiment_bars_df):
+        """Test that evaluate gives the same answer on a precomputed latest-bar map."""
+        latest_by_ticker = {'PETR4.SA': sample_sentiment_bars_df.iloc[1].to_dict()}
+
+        assert _rule([{'field': 'mean_sent', 'operator': '<', 'value': 0}]).evaluate(latest_by_ticker)
+
+    def test_missing_ticker(self, sample_sentiment_bars_df):
+        """Test that a ticker without bars never fires."""
+        rule = AlertRule('rule_1', 'Test rule', 'ITUB4.SA',
+                         [{'field': 'mean_sent', 'operator': '>', 'value': -1}], [])
+
+        assert not rule.evaluate(sample_sentiment_bars_df)
+        assert not rule.evaluate({})
@@ -0,0 +1,72 @@
+"""
+Tests for the backtester module.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import roc_auc_score
+
+from backtest.backtester import _compute_auc, _compute_max_drawdown, _simulate
+
+
+class TestComputeAuc:
+    """Tests that the rank-based AUC matches sklearn's roc_auc_score."""
+
+    @pytest.mark.parametrize('n, pos_rate, decimals', [
+        (50, 0.5, None),
+        (1000, 0.1, None),
+        (1000, 0.5, 1),     # heavy ties
+        (5000, 0.3, 2),
+        (7, 0.4, 0),        # almost every prediction tied
+    ])
+    def test_matches_sklearn(self, n, pos_rate, decimals):
+        """Test random, imbalanced and tied predictions."""
+        rng = np.random.default_rng(n)
+        y_true = (rng.random(n) < pos_rate).astype(int)
+        y_true[:2] = [0, 1]
+        P = np.clip(0.3 * y_true + rng.random(n) * 0.7, 0, 1)
+        if decimals is not None:
+            P = np.round(P, decimals)
+
+        assert _compute_auc(y_true, P) == pytest.approx(roc_auc_score(y_true, P), abs=1e-12)
+
+    @pytest.mark.parametrize('P, expected', [
+        ([0.1, 0.2, 0.8, 0.9], 1.0),
+        ([0.9, 0.8, 0.2, 0.1], 0.0),
+        ([0.5, 0.5, 0.5, 0.5], 0.5),
+    ])
+    def test_extremes(self, P, expected):
+        """Test perfect, inverted and constant rankings."""
+        y_true = np.array([0, 0, 1, 1])
+
+        assert _compute_auc(y_true, np.array(P)) == pytest.approx(roc_auc_score(y_true, P)) == expected
+
+    def test_single_class_raises(self):
+        """Test that one-class labels raise ValueError like sklearn."""
+        with pytest.raises(ValueError):
+            _compute_auc(np.ones(5, dtype=int), np.linspace(0, 1, 5))
+
+
+class TestSimulate:
+    """Tests for the log-space equity curve."""
+
+    def test_matches_cumprod(self):
+        """Test that the equity curve matches compounding the bar returns."""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'P': rng.random(500), 'r_fwd': rng.normal(0, 0.02, 500)})
+
+        _simulate(df, 0.5, 10)
+
+        np.testing.assert_allclose(df['equity'], (1 + df['pnl']).cumprod(), rtol=1e-9)
+
+    @pytest.mark.parametrize('r_fwd', [-1.0, -1.5])
+    def test_total_loss_stays_finite(self, r_fwd):
+        """Test that a bar losing everything floors equity near zero instead of -inf/NaN."""
+        df = pd.DataFrame({'P': [0.9, 0.9, 0.9], 'r_fwd': [0.1, r_fwd, 0.05]})
+
+        log_equity = _simulate(df, 0.5, 0)
+
+        assert np.isfinite(log_equity).all()
+        assert df['equity'].iloc[-1] == pytest.approx(0.0, abs=1e-9)
+        assert _compute_max_drawdown(log_equity) == pytest.approx(-1.0)
@@ -0,0 +1,120 @@
+"""
+Tests for the chart_utils module.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_utils import downsample_for_plot, lttb_indices, rolling_corr
+
+
+def _reference_lttb(x, y, n_out):
+    """Reference: textbook per-point LTTB (Steinarsson, 2013)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return list(range(n))
+    every = (n - 2) / (n_out - 2)
+    kept = [0]
+    a = 0
+    for i in range(n_out - 2):
+        avg_start = math.floor((i + 1) * every) + 1
+        avg_end = min(math.floor((i + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, math.floor((i + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+class TestLttbIndices:
+    """Tests that the bucketed numpy LTTB matches the textbook algorithm."""
+
+    @pytest.mark.parametrize('n, n_out', [(10, 3), (100, 7), (1000, 100), (4999, 2000), (5000, 2000), (12345, 321)])
+    def test_matches_reference(self, n, n_out):
+        """Test that the kept indices equal the per-point reference."""
+        rng = np.random.default_rng(n)
+        x = np.sort(rng.uniform(0, 1e6, n))
+        y = rng.normal(size=n).cumsum()
+
+        assert lttb_indices(x, y, n_out).tolist() == _reference_lttb(x.tolist(), y.tolist(), n_out)
+
+    @pytest.mark.parametrize('n_out', [2, 50, 60])
+    def test_short_or_degenerate_keeps_all(self, n_out):
+        """Test that nothing is dropped when n_out can't reduce the series."""
+        x = np.arange(50, dtype=float)
+
+        assert lttb_indices(x, x, n_out).tolist() == list(range(50))
+
+
+class TestDownsampleForPlot:
+    """Tests for per-trace downsampling of plot frames."""
+
+    def _frame(self, n_per_ticker):
+        rng = np.random.default_rng(0)
+        frames = [
+            pd.DataFrame({
+                'ticker': ticker,
+                'bucket_start': pd.date_range('2024-01-01', periods=n, freq='h'),
+                'probability': rng.random(n),
+            })
+            for ticker, n in n_per_ticker.items()
+        ]
+        return pd.concat(frames, ignore_index=True)
+
+    def test_small_frame_is_returned_unchanged(self):
+        """Test that traces under the limit are not touched."""
+        df = self._frame({'A': 50, 'B': 80})
+
+        assert downsample_for_plot(df, 'bucket_start', 'probability', by='ticker', max_points=100) is df
+
+    def test_each_trace_is_capped(self):
+        """Test that every trace keeps at most max_points rows, including its endpoints."""
+        df = self._frame({'A': 500, 'B': 30})
+        df.loc[3, 'probability'] = np.nan
+
+        result = downsample_for_plot(df, 'bucket_start', 'probability', by='ticker', max_points=100)
+
+        sizes = result.groupby('ticker').size()
+        assert sizes['A'] == 100 and sizes['B'] == 30
+        assert result['probability'].notna().all()
+        a_rows = result[result['ticker'] == 'A']['bucket_start']
+        assert a_rows.iloc[0] == df.loc[0, 'bucket_start']
+        assert a_rows.iloc[-1] == df.loc[499, 'bucket_start']
+
+
+class TestRollingCorr:
+    """Tests that rolling_corr matches Series.rolling().corr."""
+
+    @pytest.mark.parametrize('window', [2, 4, 10])
+    def test_matches_pandas(self, window):
+        """Test random series with NaN gaps and a constant stretch."""
+        rng = np.random.default_rng(window)
+        n = 300
+        probability = pd.Series(rng.random(n).astype(np.float32))
+        close = pd.Series(100 + rng.normal(size=n).cumsum())
+        probability[50:60] = 0.5
+        probability[100] = np.nan
+        future_return = close.pct_change().shift(-1)
+
+        result = rolling_corr(probability, future_return, window)
+
+        expected = probability.rolling(window=window).corr(future_return).to_numpy()
+        finite = np.isfinite(expected)
+        np.testing.assert_allclose(result[finite], expected[finite], rtol=1e-9, atol=1e-9)
+        # pandas reports inf for zero-variance windows; the chart gets NaN instead
+        assert np.isnan(result[~finite]).all()
+        assert (~finite).sum() > window
+
+    def test_shorter_than_window(self):
+        """Test that a series shorter than the window is all NaN."""
+        assert np.isnan(rolling_corr([1.0, 2.0], [1.0, 2.0], 4)).all()
@@ -0,0 +1,79 @@
+"""
+Tests for the label module.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.label import _resample_prices_weekly
+
+
+def _reference_weekly(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """Reference: per-ticker resample to weeks starting Monday, as before the weekly grid."""
+    return (
+        prices_df
+        .set_index('timestamp')
+        .groupby('ticker')
+        .resample('W-MON', label='left', closed='left')['close']
+        .last()
+        .reset_index()
+        .rename(columns={'timestamp': 'bucket_start'})
+    )
+
+
+def _prices(tickers, tz='UTC', seed=0):
+    """Daily and intraday closes with gaps of several weeks and some missing closes."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i, ticker in enumerate(tickers):
+        start = pd.Timestamp('2024-01-03 10:30', tz=tz) + pd.Timedelta(days=3 * i)
+        timestamps = start + pd.to_timedelta(np.sort(rng.choice(24 * 200, 150, replace=False)), unit='h')
+        # A run of dropped rows leaves whole weeks empty inside the ticker's range
+        gap = (timestamps >= start + pd.Timedelta(days=30)) & (timestamps <= start + pd.Timedelta(days=55))
+        timestamps = timestamps[~gap]
+        frames.append(pd.DataFrame({
+            'ticker': ticker,
+            'timestamp': timestamps,
+            'close': rng.uniform(10, 50, len(timestamps)),
+        }))
+    prices = pd.concat(frames, ignore_index=True)
+    prices.loc[prices.sample(frac=0.1, random_state=seed).index, 'close'] = np.nan
+    return prices.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+class TestResamplePricesWeekly:
+    """Tests that the weekly price grid matches a per-ticker resample."""
+
+    @pytest.mark.parametrize('tickers', [['PETR4.SA'], ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']])
+    @pytest.mark.parametrize('tz', ['UTC', None])
+    def test_matches_resample(self, tickers, tz):
+        """Test single- and multi-ticker prices, tz-aware and naive."""
+        prices = _prices(tickers, tz=tz)
+
+        result = _resample_prices_weekly(prices)
+
+        expected = _reference_weekly(prices)
+        # The gap must leave weeks without any input row, not just weeks of missing closes
+        weeks_with_rows = prices.assign(
+            week=prices['timestamp'].dt.normalize() - pd.to_timedelta(prices['timestamp'].dt.dayofweek, unit='D')
+        )[['ticker', 'week']].drop_duplicates()
+        assert len(weeks_with_rows) < len(expected)
+        assert expected['close'].isna().any()
+        pd.testing.assert_frame_equal(
+            result.sort_values(['ticker', 'bucket_start']).reset_index(drop=True),
+            expected.sort_values(['ticker', 'bucket_start']).reset_index(drop=True),
+        )
+
+    def test_fills_empty_weeks_with_nan(self):
+        """Test that weeks without a bar inside a ticker's range are kept as NaN."""
+        prices = pd.DataFrame({
+            'ticker': ['A', 'A', 'B', 'B'],
+            'timestamp': pd.to_datetime(['2024-01-02', '2024-01-23', '2024-01-09', '2024-01-10'], utc=True),
+            'close': [1.0, 2.0, 3.0, 4.0],
+        })
+
+        result = _resample_prices_weekly(prices)
+
+        assert result[result['ticker'] == 'A']['close'].isna().tolist() == [False, True, True, False]
+        assert result[result['ticker'] == 'B']['close'].tolist() == [4.0]
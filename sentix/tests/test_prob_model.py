@@ -112,6 +112,23 @@ class TestProbModel:
         assert len(probas) == len(X)
         assert not any(np.isnan(probas))
 
+    def test_clone_is_unfitted_copy(self, sample_training_df):
+        """Test that clone returns an unfitted model with the same parameters."""
+        feature_cols = [col for col in sample_training_df.columns if FEATURE_PATTERN.match(col)]
+        X = sample_training_df[feature_cols]
+        y = sample_training_df['y']
+
+        model = ProbModel()
+        model.fit(X, y)
+
+        cloned = model.clone()
+
+        assert cloned is not model
+        assert cloned.model is not model.model
+        assert cloned.feature_cols is None
+        assert cloned.model.get_params().keys() == model.model.get_params().keys()
+        assert not hasattr(cloned.model, 'calibrated_classifiers_')
+
 
 class TestProbModelSaveLoad:
     """Tests for model persistence."""